@@ -0,0 +1,289 @@
+"""
+Repeatable timings for the game's hot paths, on the real levels and on
+synthetic levels scaled from 10 to 10,000 objects.
+
+    python benchmark.py [--scales 10 100 1000 10000] [--output benchmark.json]
+                        [--baseline baseline.json] [--threshold 0.25]
+                        [--update-baseline]
+
+Every benchmark reports the best and median time per call in microseconds.
+With --baseline, each median is compared with the stored one and any that
+got slower by more than --threshold (a fraction) is listed as a regression;
+the exit status is then 1. --update-baseline writes this run's results to
+the --baseline path instead of comparing.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+import main
+
+
+DEFAULT_SCALES = (10, 100, 1000, 10000)
+
+# Repeating 8-column pattern of the synthetic levels: what sits on each column
+# besides its floor block. Lava replaces the floor of its column.
+SECTION_PATTERN = (None, None, "collectible", "fire", None, "spikes", "lava", None)
+
+
+def synthetic_level(object_count):
+    """
+    Builds a flat level of roughly object_count objects: a floor with
+    collectibles, fire, spikes and lava spread along it, a start and end
+    checkpoint, and a boss near the start. Returns the player and World.
+    """
+    size = main.BLOCK_SIZE
+    floor_y = main.HEIGHT - size
+    collectible_size = 96
+
+    objects = []
+    start = main.StartCheckpoint(size, floor_y - main.StartCheckpoint.CHECKPOINT_FRAME_HEIGHT * 2)
+    objects.append(start)
+    boss = main.RockHead(size * 6, 0)
+    boss.rect.y = floor_y - boss.height
+    boss.start_x = boss.rect.x
+    objects.append(boss)
+
+    column = 0
+    while len(objects) < max(object_count - 1, 2):
+        x = column * size
+        extra = SECTION_PATTERN[column % len(SECTION_PATTERN)]
+        if extra == "lava":
+            objects.append(main.Lava(x, floor_y))
+        else:
+            objects.append(main.Block(x, floor_y, size, "GRASS_TOP"))
+        if extra == "collectible":
+            objects.append(main.Collectible(x, floor_y - collectible_size, collectible_size, collectible_size))
+        elif extra == "fire":
+            objects.append(main.Fire(x + size // 3, floor_y - main.Fire.FIRE_HEIGHT))
+        elif extra == "spikes":
+            objects.append(main.Spikes(x, floor_y - main.Spikes.SPIKE_HEIGHT))
+        column += 1
+
+    objects.append(main.EndCheckpoint(column * size, floor_y - main.EndCheckpoint.CHECKPOINT_FRAME_HEIGHT * 2))
+
+    player = main.Player(size + 20, floor_y - 64, 50, 50)
+    start.activate(player)
+    return player, main.World(objects)
+
+
+def quiet():
+    """Swallows the game's prints (pickups, hits, checkpoints) so they stay out of the report."""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+@contextlib.contextmanager
+def no_present():
+    """
+    Stubs out pygame.display.update, so draw benchmarks time drawing into
+    the offscreen surface they are given, not presenting the real window.
+    """
+    update = pygame.display.update
+    pygame.display.update = lambda *rects: None
+    try:
+        yield
+    finally:
+        pygame.display.update = update
+
+
+def culled_note(name, world):
+    """A record() note for draw benchmarks: how many objects the last draw culled off-screen."""
+    if name.startswith("draw"):
+        return lambda: f" {world.index.culled} culled"
+    return None
+
+
+def time_call(func, number, repeat):
+    """Runs func number times per round for repeat rounds; returns (best, median) microseconds per call."""
+    rounds = []
+    with quiet():
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            rounds.append((time.perf_counter() - start) / number * 1e6)
+    return min(rounds), statistics.median(rounds)
+
+
+def place_on(player, obj):
+    """Moves the player so it overlaps obj."""
+    player.rect.centerx = obj.rect.centerx
+    player.rect.bottom = obj.rect.bottom
+    player.update()
+
+
+def level_benchmarks(player, world, window, background):
+    """Returns {name: (func, number)} for the per-frame hot paths on one built level."""
+    player.loop(main.FPS) # Gives the player a sprite and mask
+    level_width = main.level_width_for(world, None)
+    home = player.rect.topleft
+    idle = main.InputState()
+
+    def tick():
+        player.rect.topleft = home
+        player.y_vel = 0
+        player.loop(main.FPS)
+        main.handle_move(player, world, idle)
+
+    def tick_spatial_hash():
+        # The same tick with terrain found through the spatial hash, for comparison with the tile grid
+        grid, world.tile_grid = world.tile_grid, None
+        try:
+            tick()
+        finally:
+            world.tile_grid = grid
+
+    hazard = next(iter(world.hazards), None)
+    collectible = next(iter(world.collectibles), None)
+    boss = world.boss
+
+    def hit_trap():
+        player.hit = False
+        main.check_hit_trap(player, world.spatial_hash.query(player.rect))
+
+    def collect():
+        # Collects the banana and puts it back, so every call takes the hit path
+        main.check_collectible(player, world, world.spatial_hash.query(player.rect))
+        if collectible not in world.collectibles:
+            world.add(collectible)
+
+    def boss_collision():
+        player.hit = False
+        player.health = 5
+        main.handle_boss_collision(player, world)
+
+    def draw_frame():
+        player.rect.topleft = home
+        main.draw(window, background, player, world, main.camera_offset(player.rect.centerx, level_width))
+
+    presenter = main.DirtyRectPresenter()
+
+    def draw_still():
+        # Same camera every call, so after the first frame only changed regions are redrawn
+        player.rect.topleft = home
+        main.draw(window, background, player, world, main.camera_offset(player.rect.centerx, level_width),
+                  presenter=presenter)
+
+    benches = {"tick": (tick, 200), "tick_spatial_hash": (tick_spatial_hash, 200), "draw": (draw_frame, 20), "draw_dirty_rects": (draw_still, 20)}
+    if hazard is not None:
+        benches["check_hit_trap"] = (lambda: (place_on(player, hazard), hit_trap()), 500)
+    if collectible is not None:
+        benches["check_collectible"] = (lambda: (place_on(player, collectible), collect()), 500)
+    if boss is not None:
+        benches["handle_boss_collision"] = (lambda: (place_on(player, boss), boss_collision()), 500)
+    return benches
+
+
+def run(scales, repeat):
+    main.init_display()
+    offscreen = pygame.Surface((main.WIDTH, main.HEIGHT))
+    background = main.get_background("Blue.png")
+    floor_y = main.HEIGHT - main.BLOCK_SIZE
+    results = {}
+
+    def record(name, func, number, note=None):
+        """note, if given, is called after timing for text to print after the result."""
+        best, median = time_call(func, number, repeat)
+        results[name] = {"best_us": round(best, 2), "median_us": round(median, 2)}
+        print(f"{name:46s} {median:12.1f} us (best {best:.1f}){note() if note else ''}")
+
+    # Warm the asset cache so builds time object construction, not PNG decoding
+    with quiet():
+        for level_id in main.LEVEL_IDS:
+            main.create_level_objects(level_id, main.BLOCK_SIZE, floor_y)
+
+    for level_id in main.LEVEL_IDS:
+        with quiet():
+            player, world, _, _ = main.create_level_objects(level_id, main.BLOCK_SIZE, floor_y)
+        # A streamed level only builds the segments around its start; time the whole level separately
+        streamed = "_streamed_start" if world.stream is not None else ""
+        record(f"create_level_objects{streamed}[{level_id}]",
+               lambda: main.create_level_objects(level_id, main.BLOCK_SIZE, floor_y), 5)
+        record(f"build_level_objects[{level_id}]",
+               lambda: main.build_level_objects(main.load_level(level_id), main.BLOCK_SIZE, floor_y), 5)
+        with no_present():
+            for name, (func, number) in level_benchmarks(player, world, offscreen, background).items():
+                record(f"{name}[{level_id}]", func, number, culled_note(name, world))
+
+    for scale in scales:
+        with quiet():
+            player, world = synthetic_level(scale)
+        record(f"synthetic_build[{scale}]", lambda: synthetic_level(scale), 1, lambda: f" {len(world)} objects")
+        with no_present():
+            for name, (func, number) in level_benchmarks(player, world, offscreen, background).items():
+                record(f"{name}[{scale}]", func, number, culled_note(name, world))
+
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Returns [(name, old, new, ratio)] for every median slower than baseline by more than threshold."""
+    regressions = []
+    for name, entry in results.items():
+        old = baseline.get(name)
+        if not old or old["median_us"] <= 0:
+            continue
+        ratio = entry["median_us"] / old["median_us"]
+        if ratio > 1 + threshold:
+            regressions.append((name, old["median_us"], entry["median_us"], ratio))
+    return regressions
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=list(DEFAULT_SCALES),
+                        help="object counts of the synthetic levels")
+    parser.add_argument("--repeat", type=int, default=5, help="timing rounds per benchmark")
+    parser.add_argument("--output", default="benchmark.json", help="where to write this run's results")
+    parser.add_argument("--baseline", help="stored results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="slowdown fraction that counts as a regression (default: 0.25)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="write the results to --baseline instead of comparing")
+    args = parser.parse_args(argv)
+
+    results = run(args.scales, args.repeat)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "machine": platform.machine(),
+            "numpy": main.np is not None,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    if not args.baseline:
+        return 0
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Updated baseline {args.baseline}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.threshold)
+    for name, old, new, ratio in regressions:
+        print(f"REGRESSION {name}: {old:.1f} -> {new:.1f} us ({ratio:.2f}x)")
+    if not regressions:
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
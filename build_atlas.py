@@ -0,0 +1,115 @@
+"""
+Packs every sprite sheet and terrain tile the game uses into pre-sliced,
+pre-scaled atlas pages plus a JSON manifest, written to assets/Atlas/.
+
+    python build_atlas.py [--page-size 2048]
+
+The game picks the atlas up automatically on the next start. Re-run this
+after changing any PNG under assets/, or delete assets/Atlas/ to go back to
+loading the PNGs directly.
+"""
+import argparse
+import json
+import os
+from os.path import join
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+import main
+
+
+PADDING = 1
+
+
+def collect_frames():
+    """Instantiates every level with the atlas disabled and returns {name: frames} from the asset cache."""
+    main.init_display()
+    main.ATLAS.enabled = False
+    main.ASSET_CACHE.max_bytes = float("inf") # Nothing may be evicted while collecting
+
+    floor_y = main.HEIGHT - main.BLOCK_SIZE
+    for level_id in main.LEVEL_IDS:
+        # Instantiate whole levels: a streamed world only loads the segments near the start
+        main.build_level_objects(main.load_level(level_id), main.BLOCK_SIZE, floor_y)
+    main.Player.load_sprites() # Levels hold no Player; the character sheets are loaded by hand
+
+    frames = {}
+    for key, (value, _) in main.ASSET_CACHE.entries.items():
+        kind, path, frame, scale, direction = key[:5]
+        if kind == "frames":
+            frames[main.atlas_name(path, frame, scale, direction)] = value
+        elif kind == "tile":
+            frames[main.atlas_name(path, frame, scale)] = [value]
+    return frames
+
+
+def pack(frames, page_size):
+    """
+    Shelf-packs all frames (tallest first) into square pages.
+    Returns (pages, entries) where entries maps name -> [page, x, y, w, h] per frame.
+    """
+    items = [(name, i, surface) for name, sprites in frames.items() for i, surface in enumerate(sprites)]
+    items.sort(key=lambda item: (-item[2].get_height(), item[0], item[1]))
+
+    pages = []
+    entries = {name: [None] * len(sprites) for name, sprites in frames.items()}
+    x = y = shelf_height = 0
+
+    for name, i, surface in items:
+        w, h = surface.get_size()
+        if w > page_size or h > page_size:
+            raise ValueError(f"Frame {name}[{i}] ({w}x{h}) does not fit a {page_size}px page")
+
+        if not pages or x + w > page_size:
+            # Start a new shelf
+            x = 0
+            y += shelf_height + PADDING
+            shelf_height = 0
+        if not pages or y + h > page_size:
+            pages.append(pygame.Surface((page_size, page_size), pygame.SRCALPHA, 32))
+            x = y = shelf_height = 0
+
+        pages[-1].blit(surface, (x, y))
+        entries[name][i] = [len(pages) - 1, x, y, w, h]
+        x += w + PADDING
+        shelf_height = max(shelf_height, h)
+
+    if pages:
+        # Trim the unused rows below the last shelf
+        pages[-1] = pages[-1].subsurface((0, 0, page_size, y + shelf_height)).copy()
+
+    return pages, entries
+
+
+def write_atlas(pages, entries, directory):
+    os.makedirs(directory, exist_ok=True)
+    manifest = {"pages": [], "frames": entries}
+
+    for i, page in enumerate(pages):
+        filename = f"atlas_{i}.rgba"
+        with open(join(directory, filename), "wb") as f:
+            f.write(pygame.image.tobytes(page, "RGBA"))
+        manifest["pages"].append({"file": filename, "size": list(page.get_size())})
+
+    with open(join(directory, main.ATLAS_MANIFEST), "w") as f:
+        json.dump(manifest, f, sort_keys=True)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--page-size", type=int, default=2048, help="width and height of each atlas page")
+    args = parser.parse_args()
+
+    frames = collect_frames()
+    pages, entries = pack(frames, args.page_size)
+    directory = main.get_base_path(main.ATLAS_DIR)
+    write_atlas(pages, entries, directory)
+
+    frame_count = sum(len(sprites) for sprites in frames.values())
+    print(f"Packed {frame_count} frames from {len(frames)} sheets into {len(pages)} page(s) in {directory}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,209 @@
+"""
+Seeded generator of long levels for scale and soak testing. A level is a
+chain of randomly parametrised versions of the hand-built sections:
+floating islands, stepping stones, fire gauntlet, spike platforms, lava
+pits and (once, at the end) the boss arena, all made of the game's own
+object classes. Levels are produced as spawns and streamed like the
+built-in ones, so only the segments around the camera are instantiated.
+
+    python level_generator.py --length 10000 [--seed 0] [--soak TICKS]
+
+Prints the entity counts, build time and peak memory of the level; with
+--soak it also simulates the level headless for TICKS steps.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import main
+from main import BLOCK_SIZE, HEIGHT, EndCheckpoint, Fire, Player, RockHead, Spikes, StartCheckpoint
+
+
+SECTION_TYPES = ("floating_islands", "stepping_stones", "fire_gauntlet",
+                 "spike_platforms", "lava_pit", "boss_arena")
+
+
+class LevelBuilder:
+    """Appends (kind, x, y, extra) spawns column by column; columns count blocks from the level start."""
+
+    def __init__(self, rng, block_size=BLOCK_SIZE, floor_y=None):
+        self.rng = rng
+        self.block_size = block_size
+        self.floor_y = HEIGHT - block_size if floor_y is None else floor_y
+        self.spawns = []
+        self.column = 0
+
+    def y_above_floor(self, blocks):
+        return self.floor_y - self.block_size * blocks
+
+    def block(self, column, y, terrain_key):
+        self.spawns.append(("Block", column * self.block_size, y, terrain_key))
+
+    def ground(self, length, top="GRASS_TOP", fill="DIRT_FILL"):
+        """Two-deep floor starting at the current column."""
+        for i in range(self.column, self.column + length):
+            self.block(i, self.floor_y, top)
+            self.block(i, self.floor_y + self.block_size, fill)
+
+    def banana(self, column, surface_y):
+        self.spawns.append(("Collectible", column * self.block_size, surface_y - main.COLLECTIBLE_SIZE, None))
+
+    # --- Sections: each builds from self.column onwards and advances it ---
+
+    def floating_islands(self):
+        """Ground run, then a gap with one to three raised islands carrying bananas."""
+        run = self.rng.randint(2, 4)
+        self.ground(run)
+        self.column += run + 1
+        for _ in range(self.rng.randint(1, 3)):
+            width = self.rng.randint(2, 4)
+            y = self.y_above_floor(self.rng.choice((1, 2, 2, 3)))
+            for i in range(self.column, self.column + width):
+                self.block(i, y, "GRASS_TOP")
+            self.banana(self.rng.randrange(self.column, self.column + width), y)
+            self.column += width + self.rng.randint(1, 2)
+
+    def stepping_stones(self):
+        """Single stone blocks at varying heights over a pit."""
+        self.ground(2, "STONE_TOP", "STONE_FILL")
+        self.column += 3
+        for _ in range(self.rng.randint(2, 5)):
+            y = self.y_above_floor(self.rng.choice((1, 1.5, 2, 2.5, 3.5)))
+            self.block(self.column, y, "STONE_TOP")
+            if self.rng.random() < 0.4:
+                self.banana(self.column, y)
+            self.column += self.rng.randint(2, 3)
+
+    def fire_gauntlet(self):
+        """Raised dirt platform with fires to time jumps over."""
+        width = self.rng.randint(4, 8)
+        y = self.y_above_floor(1)
+        for i in range(self.column, self.column + width):
+            self.block(i, y, "DIRT_FILL")
+        self.banana(self.column, y)
+        for i in range(self.column + 1, self.column + width - 1, 2):
+            offset = self.rng.choice((0, Fire.FIRE_WIDTH))
+            self.spawns.append(("Fire", i * self.block_size + offset, y - Fire.FIRE_HEIGHT, None))
+        self.column += width + 2
+
+    def spike_platforms(self):
+        """Stone platform with spikes on every other tile."""
+        width = self.rng.randint(3, 6)
+        y = self.y_above_floor(self.rng.choice((1, 2)))
+        for i in range(self.column, self.column + width):
+            self.block(i, y, "STONE_TOP")
+        spikes_y = y - Spikes.SPIKE_HEIGHT
+        for i in range(self.column + 1, self.column + width, 2):
+            self.spawns.append(("Spikes", i * self.block_size, spikes_y, None))
+        self.banana(self.column, spikes_y)
+        self.column += width + 2
+
+    def lava_pit(self):
+        """Landing ground, then a run of lava to jump across."""
+        self.ground(2)
+        self.column += 2
+        width = self.rng.randint(2, 4)
+        for i in range(self.column, self.column + width):
+            self.spawns.append(("Lava", i * self.block_size, self.floor_y, None))
+        self.column += width
+
+    def boss_arena(self):
+        """Stone arena with two platforms, fire at both ends and a patrolling RockHead."""
+        width = self.rng.randint(6, 9)
+        self.ground(width, "STONE_TOP", "STONE_FILL")
+        start = self.column
+        self.block(start + width // 2 + 1, self.y_above_floor(2), "STONE_TOP")
+        self.block(start + 1, self.y_above_floor(4), "STONE_TOP")
+        fire_y = self.floor_y - Fire.FIRE_HEIGHT
+        self.spawns.append(("Fire", start * self.block_size, fire_y, None))
+        self.spawns.append(("Fire", (start + width - 1) * self.block_size, fire_y, None))
+
+        boss_x = (start + width // 2) * self.block_size
+        boss_y = self.floor_y - RockHead.BOSS_FRAME_HEIGHT * RockHead.BOSS_SCALE_FACTOR
+        patrol = (boss_x - self.block_size * 1.5, self.block_size * min(3, width // 2))
+        self.spawns.append(("RockHead", boss_x, boss_y, patrol))
+        self.column += width
+
+
+def generate_level(length, seed=0, sections=SECTION_TYPES, block_size=BLOCK_SIZE, floor_y=None):
+    """
+    Builds a level about length blocks wide from the given section types.
+    The boss arena, if requested, is used once right before the goal, since
+    the game only fights one boss per level. Returns (player, world).
+    """
+    builder = LevelBuilder(random.Random(seed), block_size, floor_y)
+    repeating = [name for name in sections if name != "boss_arena"]
+
+    builder.ground(7)
+    builder.spawns.append(("StartCheckpoint", block_size,
+                           builder.floor_y - StartCheckpoint.CHECKPOINT_FRAME_HEIGHT * 2, True))
+    builder.column = 7
+
+    while repeating and builder.column < length:
+        getattr(builder, builder.rng.choice(repeating))()
+    if "boss_arena" in sections:
+        builder.boss_arena()
+
+    builder.ground(3)
+    builder.spawns.append(("EndCheckpoint", (builder.column + 1) * block_size,
+                           builder.floor_y - EndCheckpoint.CHECKPOINT_FRAME_HEIGHT * 2, None))
+
+    player = Player(block_size + 20, builder.floor_y - main.PLAYER_HEIGHT, 50, 50)
+    return player, main.build_world(builder.spawns, player, block_size, builder.floor_y)
+
+
+def summarize(world):
+    """Entity counts of a generated level by kind and in total, plus how many are resident right now."""
+    spawns = world.stream.spawns
+    counts = Counter(kind for kind, _, _, _ in spawns)
+    summary = dict(sorted(counts.items()))
+    summary["total"] = len(spawns)
+    summary["resident"] = len(world)
+    summary["width_px"] = world.stream.right
+    return summary
+
+
+def peak_memory_mb():
+    """Peak resident set size of this process, or None where the resource module is unavailable."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a long level and report its size")
+    parser.add_argument("--length", type=int, default=10000, help="level length in blocks")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sections", nargs="+", choices=SECTION_TYPES, default=list(SECTION_TYPES))
+    parser.add_argument("--soak", type=int, metavar="TICKS", default=0,
+                        help="also simulate the level headless for this many steps")
+    args = parser.parse_args(argv)
+
+    main.init_display()
+    start = time.perf_counter()
+    player, world = generate_level(args.length, args.seed, args.sections)
+    build = time.perf_counter() - start
+
+    for name, count in summarize(world).items():
+        print(f"{name:16s} {count}")
+    print(f"{'build_seconds':16s} {build:.3f}")
+    memory = peak_memory_mb()
+    if memory is not None:
+        print(f"{'peak_rss_mb':16s} {memory:.1f}")
+
+    if args.soak:
+        report = main.simulate(player, world, "generated", main.scripted_inputs("random", args.seed), args.soak)
+        main.print_headless_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
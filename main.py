@@ -1,22 +1,201 @@
+import time
+_IMPORT_START = time.perf_counter() # Taken before the heavy imports so the startup report can include them
+
 import os
 import random
 import math
+import json
+import mmap
+import argparse
+import bisect
+import csv
+import hashlib
+import struct
+import queue
+import threading
 import pygame
+from array import array
+from collections import Counter, OrderedDict
 # Import specific modules from os for clarity and robustness
 from os import listdir
 from os.path import isfile, join, dirname, abspath
 
-pygame.init()
-
-pygame.display.set_caption("Uga-Buga Platformer")
+try:
+    import numpy as np
+except ImportError: # Optional: without it terrain collision falls back to the spatial hash
+    np = None
 
 # --- Constants ---
 WIDTH, HEIGHT = 1000, 800
 FPS = 60
 PLAYER_VEL = 5
 BLOCK_SIZE = 96 # Consistent size for terrain blocks
+LEVEL_IDS = ("level_01", "level_02")
+BACKGROUND_PARALLAX = 0.0 # Fraction of the camera speed the background scrolls at (0 = static)
+SIM_DT = 1.0 / FPS # Physics always advances in fixed steps of this many seconds
+RENDER_FPS = FPS # Cap for rendered frames; 0 renders as fast as possible
+MAX_CATCHUP_STEPS = 5 # Most simulation steps run per rendered frame before time is dropped
+ACTIVITY_MARGIN = WIDTH # Animated entities further than this outside the camera sleep
+DIRTY_RECTS = False # Push only the changed screen regions while the camera holds still
+RECORD_PATH = None # Base path run_level numbers the input recording of each level run after, if any
+
+# --- Startup ---
+
+class StartupTimer:
+    """Records wall time per startup phase for --startup-report."""
+
+    def __init__(self, start):
+        self.enabled = False
+        self.phases = []
+        self.last = start
+
+    def mark(self, name):
+        """Ends the current phase, naming it after what it just did."""
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    def report(self):
+        total = sum(duration for _, duration in self.phases)
+        print("Startup report:")
+        for name, duration in self.phases:
+            print(f"  {name:<20} {duration * 1000:8.1f} ms")
+        print(f"  {'time to title':<20} {total * 1000:8.1f} ms")
+        print(f"  asset cache: {ASSET_CACHE.stats()}")
+
+
+STARTUP = StartupTimer(_IMPORT_START)
+
+
+# --- Profiling ---
+
+# Phases of a frame, in the order they run. "rules" is the level's win logic after a step.
+PROFILE_PHASES = ("events", "stream", "player.loop", "objects", "vertical", "horizontal", "traps",
+                  "collectibles", "boss", "checkpoints", "rules", "draw", "present")
+
+
+class FrameProfiler:
+    """
+    Wall time per phase of every frame, for --profile and the F3 overlay.
+    mark() ends the phase that just ran, so every moment of a frame counts
+    towards exactly one phase; phases run more than once in a frame (one
+    simulation step per catch-up) add up. Finished frames go into a
+    fixed-size ring buffer holding the last `capacity` frames, along with
+    how many objects draw() culled that frame. Callers check `enabled`
+    before marking, so a disabled profiler costs one attribute test per
+    phase.
+    """
+    OVERLAY_REFRESH = 30 # Frames between rebuilds of the overlay surface
+
+    def __init__(self, phases=PROFILE_PHASES, capacity=FPS * 10):
+        self.enabled = False
+        self.overlay = False
+        self.phases = phases
+        self.slots = {name: i for i, name in enumerate(phases)}
+        self.capacity = capacity
+        self.samples = array("d", bytes(8 * capacity * len(phases))) # Row-major, seconds
+        self.current = array("d", bytes(8 * len(phases)))
+        self.culled = array("i", bytes(4 * capacity)) # Objects culled from each frame's draw
+        self.frames = 0 # Frames recorded so far, including those overwritten
+        self.last = 0.0
+        self.overlay_surface = None
+        self.overlay_frame = -1
+
+    def begin(self):
+        """Starts a frame."""
+        for i in range(len(self.current)):
+            self.current[i] = 0.0
+        self.last = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.current[self.slots[phase]] += now - self.last
+        self.last = now
+
+    def end(self, culled=0):
+        """Files the frame into the ring buffer; culled is what its draw() returned."""
+        slot = self.frames % self.capacity
+        start = slot * len(self.phases)
+        self.samples[start:start + len(self.phases)] = self.current
+        self.culled[slot] = culled
+        self.frames += 1
+
+    def culled_counts(self):
+        """The culled count of each buffered frame, oldest first."""
+        count = min(self.frames, self.capacity)
+        return [self.culled[i % self.capacity] for i in range(self.frames - count, self.frames)]
+
+    def rows(self):
+        """The buffered frames, oldest first, as per-phase durations in seconds."""
+        n, width = len(self.phases), self.capacity
+        count = min(self.frames, width)
+        first = self.frames - count
+        return [self.samples[(i % width) * n:(i % width + 1) * n] for i in range(first, self.frames)]
+
+    def percentiles(self, *quantiles):
+        """{phase: [milliseconds at each quantile]} over the buffered frames, with "total" last."""
+        rows = self.rows()
+        columns = {name: [row[i] for row in rows] for i, name in enumerate(self.phases)}
+        columns["total"] = [sum(row) for row in rows]
+        result = {}
+        for name, values in columns.items():
+            values.sort()
+            result[name] = [values[min(len(values) - 1, int(q * len(values)))] * 1000 if values else 0.0
+                            for q in quantiles]
+        return result
+
+    def overlay_footprint(self):
+        """The overlay (p50/p99 per phase) as (surface, screen rect), rebuilt every OVERLAY_REFRESH frames."""
+        if self.overlay_surface is None or self.frames - self.overlay_frame >= self.OVERLAY_REFRESH:
+            lines = [f"{'phase':<13}{'p50':>7}{'p99':>7}"]
+            lines += [f"{name:<13}{p50:7.2f}{p99:7.2f}" for name, (p50, p99) in self.percentiles(0.5, 0.99).items()]
+            culled = self.culled_counts()
+            lines.append(f"{'culled':<13}{culled[-1] if culled else 0:7d}")
+            rendered = [FONT.render(line, 12) for line in lines]
+            surface = pygame.Surface((max(line.get_width() for line in rendered) + 8, len(rendered) * 12 + 6),
+                                     pygame.SRCALPHA, 32)
+            surface.fill((0, 0, 0, 160))
+            for i, line in enumerate(rendered):
+                surface.blit(line, (4, 4 + i * 12))
+            self.overlay_surface = (surface, surface.get_rect(topleft=(8, 8)))
+            self.overlay_frame = self.frames
+        return self.overlay_surface
+
+    def dump(self, path):
+        """Writes the buffered frames in milliseconds, as CSV if path ends in .csv and JSON otherwise."""
+        rows = [[round(value * 1000, 4) for value in row] for row in self.rows()]
+        culled = self.culled_counts()
+        first = self.frames - len(rows)
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(("frame",) + self.phases + ("total", "culled"))
+                for i, row in enumerate(rows):
+                    writer.writerow([first + i] + row + [round(sum(row), 4), culled[i]])
+        else:
+            summary = {name: {"p50_ms": round(p50, 4), "p99_ms": round(p99, 4)}
+                       for name, (p50, p99) in self.percentiles(0.5, 0.99).items()}
+            with open(path, "w") as f:
+                json.dump({"phases": self.phases, "first_frame": first, "frames_ms": rows, "culled": culled,
+                           "summary": summary}, f)
+        print(f"Wrote {len(rows)} profiled frames to {path}")
+
+
+PROFILER = FrameProfiler()
+
+
+def init_display():
+    """
+    Starts only the pygame subsystem the game uses (display, which also
+    provides events) and opens the game window. Nothing in this module touches the display
+    until this is called, so it can be imported by tools and tests.
+    """
+    pygame.display.init()
+    pygame.display.set_caption("Uga-Buga Platformer")
+    window = pygame.display.set_mode((WIDTH, HEIGHT))
+    STARTUP.mark("display init")
+    return window
 
-window = pygame.display.set_mode((WIDTH, HEIGHT))
 
 # --- Utility Functions ---
 
@@ -33,15 +212,320 @@ def get_base_path(relative_path):
     return join(base_dir, relative_path)
 
 
-def load_image(relative_path, scale_factor=1):
-    """Loads a single image from a relative path and scales it."""
+class AssetCache:
+    """
+    Process-wide LRU cache for decoded images and sliced sprite frames.
+    Entries are keyed by (kind, path, frame size, scale, flip) so that every
+    loader shares a single decode per distinct asset. Pixel memory is capped
+    at max_bytes; the least recently used entries are evicted first.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict() # key -> (value, nbytes)
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, loader):
+        """Returns the cached value for key, calling loader() on a miss."""
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        value = loader()
+        self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        """Stores a value produced elsewhere, e.g. by the prefetch worker."""
+        if key in self.entries:
+            self.total_bytes -= self.entries.pop(key)[1]
+        nbytes = asset_nbytes(value)
+        self.entries[key] = (value, nbytes)
+        self.total_bytes += nbytes
+        self._evict()
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def _evict(self):
+        # Never evict the entry that was just inserted, even if it alone exceeds the cap
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            _, (_, nbytes) = self.entries.popitem(last=False)
+            self.total_bytes -= nbytes
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.total_bytes = 0
+
+    def stats(self):
+        return {
+            "entries": len(self.entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def asset_nbytes(value):
+    """Estimates the pixel memory held by a surface, mask or a container of them."""
+    if isinstance(value, pygame.Surface):
+        return value.get_width() * value.get_height() * value.get_bytesize()
+    if isinstance(value, pygame.mask.Mask):
+        width, height = value.get_size()
+        return width * height // 8
+    if isinstance(value, dict):
+        return sum(asset_nbytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(asset_nbytes(v) for v in value)
+    return 0
+
+
+ASSET_CACHE = AssetCache()
+
+
+# --- Texture Atlas ---
+
+ATLAS_DIR = join("assets", "Atlas")
+ATLAS_MANIFEST = "atlas.json"
+
+
+def atlas_name(path, frame=None, scale=2, direction=False):
+    """
+    Names an atlas entry after its source file and slicing parameters, e.g.
+    "MainCharacters/MaskDude/run_left" or "Terrain/Terrain[1,0]@96x96".
+    Frames at the default scale2x get no suffix.
+    """
+    name = os.path.splitext(os.path.relpath(path, get_base_path("assets")))[0].replace(os.sep, "/")
+    if frame is not None and len(frame) == 4:
+        name += f"[{frame[0]},{frame[1]}]"
+    if isinstance(scale, tuple):
+        name += f"@{scale[0]}x{scale[1]}"
+    elif scale != 2:
+        name += f"@{scale}x"
+    if direction:
+        name += "_left"
+    return name
+
+
+class TextureAtlas:
+    """
+    Runtime side of build_atlas.py. Each atlas page is a raw RGBA file that is
+    memory-mapped and wrapped in a surface without decoding; frames are
+    subsurfaces of their page. Loaded lazily on the first lookup; if no atlas
+    has been built, every lookup returns None and loaders fall back to PNGs.
+    """
+
+    def __init__(self, directory=ATLAS_DIR):
+        self.directory = directory
+        self.enabled = True
+        self.loaded = False
+        self.pages = []
+        self.mappings = []
+        self.entries = {} # name -> list of (page, x, y, w, h)
+        self.sources = set() # atlas_name() of every image with frames in the atlas
+
+    def load(self):
+        self.loaded = True
+        manifest_path = get_base_path(join(self.directory, ATLAS_MANIFEST))
+        if not self.enabled or not isfile(manifest_path):
+            return
+
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+        for page in manifest["pages"]:
+            with open(get_base_path(join(self.directory, page["file"])), "rb") as f:
+                pixels = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            surface = pygame.image.frombuffer(pixels, tuple(page["size"]), "RGBA")
+            if pygame.display.get_surface() is not None:
+                # Converting copies the page once into the display format
+                surface = surface.convert_alpha()
+                pixels.close()
+            else:
+                # Keep the mapping alive for as long as the surface views it
+                self.mappings.append(pixels)
+            self.pages.append(surface)
+
+        self.entries = manifest["frames"]
+        self.sources = {name.split("@")[0].split("[")[0].removesuffix("_left") for name in self.entries}
+
+    def packs(self, path):
+        """True if the atlas holds frames cut from the image at path, so it needn't be decoded."""
+        if not self.loaded:
+            self.load()
+        return atlas_name(path) in self.sources
+
+    def frames(self, name):
+        """Returns the frames packed under name as page subsurfaces, or None."""
+        if not self.loaded:
+            self.load()
+        rects = self.entries.get(name)
+        if rects is None:
+            return None
+        return [self.pages[page].subsurface((x, y, w, h)) for page, x, y, w, h in rects]
+
+
+ATLAS = TextureAtlas()
+
+
+def image_key(path, alpha=True):
+    return ("image", path, None, 1, False, alpha)
+
+
+def decode_image(path, alpha=True):
+    """Decodes an image file once and returns the shared, display-converted surface."""
+    def loader():
+        image = pygame.image.load(path)
+        return image.convert_alpha() if alpha else image.convert()
+
+    return ASSET_CACHE.get(image_key(path, alpha), loader)
+
+
+# --- Asset Prefetch ---
+
+# Images every level decodes (the background and the player), as (relative path or sprite directory, alpha)
+LEVEL_ASSETS = [
+    (join("assets", "Background", "Blue.png"), False),
+    (join("assets", "MainCharacters", "MaskDude"), True),
+]
+# Images behind each spawn kind (see SPAWN_CLASSES), in the same form
+SPAWN_ASSETS = {
+    "Block": [(join("assets", "Terrain", "Terrain.png"), True)],
+    "Lava": [], # Drawn as a plain fill
+    "Fire": [(join("assets", "Traps", "Fire"), True)],
+    "Spikes": [(join("assets", "Traps", "Spikes", "Idle.png"), True)],
+    "Collectible": [(join("assets", "Items", "Fruits", "Bananas.png"), True)],
+    "StartCheckpoint": [(join("assets", "Items", "Checkpoints", "Start"), True)],
+    "EndCheckpoint": [(join("assets", "Items", "Checkpoints", "End"), True)],
+    "RockHead": [(join("assets", "Traps", "Rock Head"), True)],
+}
+
+
+def level_asset_paths(kinds):
+    """
+    Absolute (path, alpha) pairs of the images a level with the given spawn
+    kinds decodes. Images the texture atlas packs are left out, since the
+    game reads their frames from the atlas instead.
+    """
+    paths = []
+    for relative_path, alpha in LEVEL_ASSETS + [asset for kind in sorted(kinds) for asset in SPAWN_ASSETS[kind]]:
+        path = get_base_path(relative_path)
+        if os.path.isdir(path):
+            paths.extend((join(path, f), alpha) for f in sorted(listdir(path)) if isfile(join(path, f)))
+        else:
+            paths.append((path, alpha))
+    return [(path, alpha) for path, alpha in paths if not ATLAS.packs(path)]
+
+
+class AssetPrefetcher:
+    """
+    Decodes the images of a likely level on a background thread while the
+    menus sit idle. Decoding needs no display, but convert()/convert_alpha()
+    must run on the main thread, so decoded surfaces are queued and adopt()
+    converts them into the asset cache from the menu loops.
+    """
+
+    def __init__(self):
+        self.requests = queue.Queue()
+        self.decoded = queue.Queue()
+        self.queued = set()
+        self.requested_levels = set()
+        self.thread = None
+
+    def request(self, level_id, kinds=None):
+        """
+        Queues every not-yet-cached image of level_id for background decoding.
+        kinds are the level's spawn kinds; by default they are read from its
+        compiled file in levels/, so a generated level passes its own.
+        Also loads the texture atlas pages, if there are any (main thread).
+        """
+        if level_id in self.requested_levels:
+            return
+        self.requested_levels.add(level_id)
+        if kinds is None:
+            try:
+                kinds = level_kinds(load_level(level_id))
+            except FileNotFoundError:
+                return
+
+        for path, alpha in level_asset_paths(kinds):
+            if (path, alpha) in self.queued or image_key(path, alpha) in ASSET_CACHE:
+                continue
+            self.queued.add((path, alpha))
+            self.requests.put((path, alpha))
+
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._worker, name="asset-prefetch", daemon=True)
+            self.thread.start()
+
+    def _worker(self):
+        while True:
+            path, alpha = self.requests.get()
+            try:
+                surface = pygame.image.load(path)
+            except (pygame.error, FileNotFoundError):
+                surface = None # Left for the main thread to report when it loads it for real
+            self.decoded.put((path, alpha, surface))
+
+    def adopt(self):
+        """Converts finished decodes into the asset cache. Main thread only."""
+        adopted = 0
+        while True:
+            try:
+                path, alpha, surface = self.decoded.get_nowait()
+            except queue.Empty:
+                return adopted
+            self.queued.discard((path, alpha))
+            if surface is None or image_key(path, alpha) in ASSET_CACHE:
+                continue
+            ASSET_CACHE.put(image_key(path, alpha), surface.convert_alpha() if alpha else surface.convert())
+            adopted += 1
+
+
+PREFETCH = AssetPrefetcher()
+
+
+def scale_surface(surface, scale):
+    """Scales by an integer factor (2 uses scale2x) or to an explicit (width, height)."""
+    if isinstance(scale, tuple):
+        return pygame.transform.scale(surface, scale)
+    if scale == 2:
+        return pygame.transform.scale2x(surface)
+    if scale != 1:
+        return pygame.transform.scale(surface, (int(surface.get_width() * scale), int(surface.get_height() * scale)))
+    return surface
+
+
+def slice_sheet(sprite_sheet, width, height, scale=2):
+    """Cuts a horizontal sprite sheet into width x height frames and scales each one."""
+    sprites = []
+    for i in range(sprite_sheet.get_width() // width):
+        surface = pygame.Surface((width, height), pygame.SRCALPHA, 32)
+        rect = pygame.Rect(i * width, 0, width, height)
+        surface.blit(sprite_sheet, (0, 0), rect)
+        sprites.append(scale_surface(surface, scale))
+    return sprites
+
+
+def load_image(relative_path, scale_factor=1, size=None, alpha=True):
+    """Loads a single image from a relative path and scales it (by factor or to size)."""
     path = get_base_path(relative_path)
+    scale = size if size is not None else scale_factor
     try:
-        image = pygame.image.load(path).convert_alpha()
-        if scale_factor != 1:
-            return pygame.transform.scale(image, (int(image.get_width() * scale_factor), int(image.get_height() * scale_factor)))
-        return image
-    except pygame.error as e:
+        return ASSET_CACHE.get(
+            ("scaled", path, None, scale, False, alpha),
+            lambda: scale_surface(decode_image(path, alpha), scale),
+        )
+    except (pygame.error, FileNotFoundError) as e:
         # Fallback for missing assets
         print(f"Error loading image at {path}: {e}")
         size = 100 * scale_factor
@@ -50,10 +534,69 @@ def load_image(relative_path, scale_factor=1):
         return placeholder
 
 
+def load_frames(relative_path, width, height, scale=2, direction=False):
+    """
+    Loads and caches the frames of a single sprite sheet. With direction=True the
+    result is the horizontally flipped set (facing left).
+    """
+    path = get_base_path(relative_path)
+
+    def loader():
+        sprites = ATLAS.frames(atlas_name(path, (width, height), scale, direction))
+        if sprites is not None:
+            return sprites
+        sprites = slice_sheet(decode_image(path), width, height, scale)
+        return flip(sprites) if direction else sprites
+
+    return ASSET_CACHE.get(("frames", path, (width, height), scale, direction), loader)
+
+
 def flip(sprites):
     return [pygame.transform.flip(sprite, True, False) for sprite in sprites]
 
 
+def build_masks(sprites):
+    """Builds a collision mask for every frame in a list (or dict of lists) of sprites."""
+    if isinstance(sprites, dict):
+        return {name: build_masks(frames) for name, frames in sprites.items()}
+    return [pygame.mask.from_surface(sprite) for sprite in sprites]
+
+
+def build_mask_sums(sprites):
+    """
+    Builds a summed-area table of each frame's mask bits (alpha > 127, as in
+    pygame.mask.from_surface), so "does the mask have any pixel inside this
+    rectangle" is four lookups. Tables are nested lists for fast scalar access.
+    """
+    if isinstance(sprites, dict):
+        return {name: build_mask_sums(frames) for name, frames in sprites.items()}
+    tables = []
+    for sprite in sprites:
+        bits = (pygame.surfarray.array_alpha(sprite) > 127).T.astype(np.int32) # rows are y
+        table = np.zeros((bits.shape[0] + 1, bits.shape[1] + 1), dtype=np.int32)
+        table[1:, 1:] = bits.cumsum(0).cumsum(1)
+        tables.append(table.tolist())
+    return tables
+
+
+def mask_hits_rect(sums, left, top, right, bottom):
+    """True if the mask behind sums has a set pixel inside the local rectangle."""
+    left, top = max(left, 0), max(top, 0)
+    right, bottom = min(right, len(sums[0]) - 1), min(bottom, len(sums) - 1)
+    if left >= right or top >= bottom:
+        return False
+    return sums[bottom][right] - sums[top][right] - sums[bottom][left] + sums[top][left] > 0
+
+
+def load_frame_masks(relative_path, width, height, scale=2, direction=False):
+    """Returns the per-frame masks matching load_frames(), built once per sheet."""
+    path = get_base_path(relative_path)
+    return ASSET_CACHE.get(
+        ("masks", path, (width, height), scale, direction),
+        lambda: build_masks(load_frames(relative_path, width, height, scale, direction)),
+    )
+
+
 def load_sprite_sheets(dir1, dir2, width, height, direction=False):
     """Loads sprites from a sheet in the assets directory."""
     path = get_base_path(join("assets", dir1, dir2))
@@ -67,50 +610,66 @@ def load_sprite_sheets(dir1, dir2, width, height, direction=False):
     all_sprites = {}
 
     for image in images:
-        sprite_sheet = pygame.image.load(join(path, image)).convert_alpha()
-
-        sprites = []
-        for i in range(sprite_sheet.get_width() // width):
-            surface = pygame.Surface((width, height), pygame.SRCALPHA, 32)
-            rect = pygame.Rect(i * width, 0, width, height)
-            surface.blit(sprite_sheet, (0, 0), rect)
-            sprites.append(pygame.transform.scale2x(surface))
+        relative_path = join("assets", dir1, dir2, image)
+        sprites = load_frames(relative_path, width, height)
 
         if direction:
             all_sprites[image.replace(".png", "") + "_right"] = sprites
-            all_sprites[image.replace(".png", "") + "_left"] = flip(sprites)
+            all_sprites[image.replace(".png", "") + "_left"] = load_frames(relative_path, width, height, direction=True)
         else:
             all_sprites[image.replace(".png", "")] = sprites
 
     return all_sprites
 
 
+def load_sprite_masks(dir1, dir2, width, height, direction=False):
+    """Returns masks keyed and indexed exactly like load_sprite_sheets()."""
+    path = get_base_path(join("assets", dir1, dir2))
+    return ASSET_CACHE.get(
+        ("masks", path, (width, height), 2, direction),
+        lambda: build_masks(load_sprite_sheets(dir1, dir2, width, height, direction)),
+    )
+
+
+def load_sprite_mask_sums(dir1, dir2, width, height, direction=False):
+    """Returns mask summed-area tables keyed like load_sprite_sheets(), or None without NumPy."""
+    if np is None:
+        return None
+    path = get_base_path(join("assets", dir1, dir2))
+    return ASSET_CACHE.get(
+        ("mask_sums", path, (width, height), 2, direction),
+        lambda: build_mask_sums(load_sprite_sheets(dir1, dir2, width, height, direction)),
+    )
+
+
 def get_block(size, tile_col=1, tile_row=0): 
     """
     Loads a single 32x32 terrain block from Terrain.png based on (col, row) index,
-    and scales it to the target size (e.g., 96x96).
+    and scales it to the target size (e.g., 96x96). The result is shared through
+    the asset cache, so callers must copy it before drawing onto it.
     """
-    # The path is now correctly pointing to the Terrain.png file.
     path = get_base_path(join("assets", "Terrain", "Terrain.png"))
-    image = pygame.image.load(path).convert_alpha()
-    
-    # Calculate source rectangle based on column (x) and row (y) in the 32x32 grid
-    src_x = tile_col * 32 
-    src_y = tile_row * 32
-    
-    # 1. Grab the 32x32 source image
-    source_surface = pygame.Surface((32, 32), pygame.SRCALPHA, 32)
-    rect = pygame.Rect(src_x, src_y, 32, 32) 
-    source_surface.blit(image, (0, 0), rect)
-    
-    # 2. Scale it to the BLOCK_SIZE (96x96)
-    scaled_surface = pygame.transform.scale(source_surface, (size, size))
-    
-    # 3. Create the final surface for the Block object
-    final_surface = pygame.Surface((size, size), pygame.SRCALPHA, 32)
-    final_surface.blit(scaled_surface, (0, 0))
-    
-    return final_surface
+
+    def loader():
+        packed = ATLAS.frames(atlas_name(path, (tile_col, tile_row, 32, 32), (size, size)))
+        if packed is not None:
+            return packed[0]
+
+        image = decode_image(path)
+
+        # Calculate source rectangle based on column (x) and row (y) in the 32x32 grid
+        src_x = tile_col * 32 
+        src_y = tile_row * 32
+        
+        # 1. Grab the 32x32 source image
+        source_surface = pygame.Surface((32, 32), pygame.SRCALPHA, 32)
+        rect = pygame.Rect(src_x, src_y, 32, 32) 
+        source_surface.blit(image, (0, 0), rect)
+        
+        # 2. Scale it to the BLOCK_SIZE (96x96)
+        return pygame.transform.scale(source_surface, (size, size))
+
+    return ASSET_CACHE.get(("tile", path, (tile_col, tile_row, 32, 32), (size, size), False), loader)
 
 
 # --- Player Class ---
@@ -118,17 +677,28 @@ def get_block(size, tile_col=1, tile_row=0):
 class Player(pygame.sprite.Sprite):
     COLOR = (255, 0, 0)
     GRAVITY = 1
-    # Main Character Sprites - MaskDude
-    SPRITES = load_sprite_sheets("MainCharacters", "MaskDude", 32, 32, True) 
+    # Main Character Sprites - MaskDude, loaded on first construction
+    SPRITES = None
+    MASKS = None
+    MASK_SUMS = None
     ANIMATION_DELAY = 3
     POINTS_PER_COLLECTIBLE = 10 
 
+    @classmethod
+    def load_sprites(cls):
+        if cls.SPRITES is None:
+            cls.SPRITES = load_sprite_sheets("MainCharacters", "MaskDude", 32, 32, True)
+            cls.MASKS = load_sprite_masks("MainCharacters", "MaskDude", 32, 32, True)
+            cls.MASK_SUMS = load_sprite_mask_sums("MainCharacters", "MaskDude", 32, 32, True)
+
     def __init__(self, x, y, width, height):
         super().__init__()
+        self.load_sprites()
         self.rect = pygame.Rect(x, y, width, height)
         self.x_vel = 0
         self.y_vel = 0
         self.mask = None
+        self.mask_sums = None
         self.direction = "left"
         self.animation_count = 0
         self.fall_count = 0
@@ -142,6 +712,10 @@ class Player(pygame.sprite.Sprite):
         self.invincibility_time = FPS * 2 
         self.score = 0
         
+        # Position before the last simulation step, for interpolated drawing
+        self.prev_x = x
+        self.prev_y = y
+        
         # --- Checkpoint/Respawn Data ---
         self.respawn_x = x
         self.respawn_y = y
@@ -237,37 +811,78 @@ class Player(pygame.sprite.Sprite):
         elif self.x_vel != 0:
             sprite_sheet = "run"
 
-        sprite_sheet_name = sprite_sheet + "_" + self.direction
-        sprites = self.SPRITES[sprite_sheet_name]
-        sprite_index = (self.animation_count //
+        self.sprite_sheet_name = sprite_sheet + "_" + self.direction
+        sprites = self.SPRITES[self.sprite_sheet_name]
+        self.sprite_index = (self.animation_count //
                              self.ANIMATION_DELAY) % len(sprites)
-        self.sprite = sprites[sprite_index]
+        self.sprite = sprites[self.sprite_index]
         self.animation_count += 1
         self.update()
 
     def update(self):
         self.rect = self.sprite.get_rect(topleft=(self.rect.x, self.rect.y))
-        self.mask = pygame.mask.from_surface(self.sprite)
-
-    def draw(self, win, offset_x):
+        # Masks are precomputed per frame when the sheet loads
+        self.mask = self.MASKS[self.sprite_sheet_name][self.sprite_index]
+        if self.MASK_SUMS is not None:
+            self.mask_sums = self.MASK_SUMS[self.sprite_sheet_name][self.sprite_index]
+
+    def save_position(self):
+        """Remembers the current position; call before each simulation step."""
+        self.prev_x = self.rect.x
+        self.prev_y = self.rect.y
+
+    def render_position(self, alpha):
+        """Position interpolated between the last two simulation steps (alpha in [0, 1])."""
+        return (round(self.prev_x + (self.rect.x - self.prev_x) * alpha),
+                round(self.prev_y + (self.rect.y - self.prev_y) * alpha))
+
+    def draw(self, win, offset_x, alpha=1.0):
         # Draw player only if not hit or during the flash part of the hit animation
         if not self.hit or self.hit_count // 5 % 2 == 0:
-            win.blit(self.sprite, (self.rect.x - offset_x, self.rect.y))
+            x, y = self.render_position(alpha)
+            win.blit(self.sprite, (x - offset_x, y))
+
+    def footprint(self, offset_x, alpha=1.0):
+        """What draw() puts on screen: (surface, screen rect), or None while flashed out."""
+        if self.hit and self.hit_count // 5 % 2 != 0:
+            return None
+        x, y = self.render_position(alpha)
+        return self.sprite, self.sprite.get_rect(topleft=(x - offset_x, y))
 
 
 # --- Object/Block/Fire Classes ---
 
-class Object(pygame.sprite.Sprite):
-    def __init__(self, x, y, width, height, name=None):
-        super().__init__()
-        self.rect = pygame.Rect(x, y, width, height)
-        self.image = pygame.Surface((width, height), pygame.SRCALPHA)
-        self.width = width
-        self.height = height
-        self.name = name
+class Object:
+    """
+    A level entity. Entities are small __slots__ records: a rect, references
+    to the current frame and mask, and whatever state the subclass needs.
+    Pixel data lives in class-level frame tables, loaded on first use and
+    shared by every instance of the same type (or terrain key), so an
+    entity costs bytes rather than a surface of its own. The kind is the
+    class attribute name.
+    """
+    __slots__ = ("rect", "image", "mask")
+    MOVES = False # Objects that change position after level creation are never indexed by x
+    name = None
+
+    def __init__(self, x, y, width, height):
+        self.rect = pygame.Rect(x, y, width, height) # Subclasses set image and mask
+
+    @property
+    def width(self):
+        return self.rect.width
+
+    @property
+    def height(self):
+        return self.rect.height
+
+    def draw(self, win, offset_x, offset_y=0):
+        win.blit(self.image, (self.rect.x - offset_x, self.rect.y - offset_y))
 
-    def draw(self, win, offset_x):
-        win.blit(self.image, (self.rect.x - offset_x, self.rect.y))
+    def footprint(self, offset_x, offset_y=0):
+        """What draw() puts on screen: (surface, screen rect), or None."""
+        image = self.image
+        return image, image.get_rect(topleft=(self.rect.x - offset_x, self.rect.y - offset_y))
 
 
 class Block(Object):
@@ -292,139 +907,249 @@ class Block(Object):
         "ICE_FILL": (9, 1),
     }
     
+    __slots__ = ("terrain_key",)
+    name = "block"
+    TILES = {} # (size, terrain key) -> (image, mask), shared by every block of that terrain
+    
     def __init__(self, x, y, size, terrain_key="GRASS_TOP"):
-        super().__init__(x, y, size, size, "block")
+        super().__init__(x, y, size, size)
         
         if terrain_key not in self.TERRAIN_TYPES:
             print(f"Warning: Unknown terrain key '{terrain_key}'. Using GRASS_TOP.")
             terrain_key = "GRASS_TOP"
             
-        col, row = self.TERRAIN_TYPES[terrain_key]
-        block_image = get_block(size, tile_row=row, tile_col=col) 
-        
-        self.image.blit(block_image, (0, 0))
-        self.mask = pygame.mask.from_surface(self.image)
+        self.terrain_key = terrain_key
+        self.image, self.mask = self.load_tile(size, terrain_key)
+
+    @classmethod
+    def load_tile(cls, size, terrain_key):
+        tile = cls.TILES.get((size, terrain_key))
+        if tile is None:
+            col, row = cls.TERRAIN_TYPES[terrain_key]
+            block_image = get_block(size, tile_row=row, tile_col=col) 
+            image = pygame.Surface((size, size), pygame.SRCALPHA)
+            image.blit(block_image, (0, 0))
+            tile = cls.TILES[(size, terrain_key)] = (image, pygame.mask.from_surface(image))
+        return tile
+
+
+class AnimatedObject(Object):
+    """
+    A looping animation that only depends on time and an active flag (Fire,
+    checkpoints). Its state is a frame counter, the active flag and the frame
+    index shown since the last update (-1 for the idle image). Inside a World
+    with NumPy that state is a row of the world's AnimationTable, advanced for
+    all such entities at once; image and mask are looked up from the row's
+    frame index when something actually draws or collides with the entity.
+    Outside a table, loop() advances the same state per object.
+
+    Subclasses set ANIMATION_DELAY and idle_image/idle_mask, and return the
+    looping animation from animation_frames().
+    """
+    __slots__ = ("_count", "_active", "_frame", "table", "row")
+    ANIMATION_DELAY = 1
+
+    def __init__(self, x, y, width, height, active):
+        super().__init__(x, y, width, height)
+        self._count = 0
+        self._active = active
+        self._frame = 0 if active else -1
+        self.table = None # AnimationTable holding this entity's state, if any
+        self.row = -1
+
+    def animation_frames(self):
+        """Returns (sprites, masks) of the looping animation."""
+        raise NotImplementedError
+
+    @property
+    def animation_count(self):
+        if self.table is None:
+            return self._count
+        self.table.sync(self.row)
+        return int(self.table.count[self.row])
+
+    @animation_count.setter
+    def animation_count(self, value):
+        if self.table is not None:
+            self.table.sync(self.row)
+            self.table.count[self.row] = value
+        else:
+            self._count = value
 
+    @property
+    def is_active(self):
+        return bool(self.table.active[self.row]) if self.table is not None else self._active
 
-class Fire(Object):
+    @is_active.setter
+    def is_active(self, value):
+        if self.table is not None:
+            self.table.sync(self.row) # A sleeping row catches up under the old flag first
+            self.table.active[self.row] = value
+        else:
+            self._active = value
+
+    @property
+    def frame(self):
+        """Index into animation_frames() of the frame on show, or -1 for the idle image."""
+        if self.table is None:
+            return self._frame
+        self.table.sync(self.row)
+        return int(self.table.frame[self.row])
+
+    @property
+    def image(self):
+        frame = self.frame
+        return self.idle_image if frame < 0 else self.animation_frames()[0][frame]
+
+    @property
+    def mask(self):
+        frame = self.frame
+        return self.idle_mask if frame < 0 else self.animation_frames()[1][frame]
+
+    def catch_up(self, ticks):
+        """Applies ticks missed while asleep, as that many loop() calls would (outside a table)."""
+        if ticks <= 0:
+            return
+        if not self._active:
+            self._frame = -1
+            return
+        period = self.ANIMATION_DELAY * len(self.animation_frames()[0])
+        self._count = (self._count + ticks) % period
+        self._frame = ((self._count - 1) % period) // self.ANIMATION_DELAY # Frame shown by the last missed tick
+
+    def loop(self):
+        """Advances the animation by one tick (only used when the entity is not in a table)."""
+        if self._active:
+            length = len(self.animation_frames()[0])
+            self._frame = (self._count // self.ANIMATION_DELAY) % length
+            self._count += 1
+            if self._count // self.ANIMATION_DELAY >= length:
+                self._count = 0
+        else:
+            self._frame = -1
+
+
+class Fire(AnimatedObject):
+    __slots__ = ()
+    name = "fire"
     ANIMATION_DELAY = 3
     FIRE_WIDTH = 32
     FIRE_HEIGHT = 64
+    SPRITES = None # Shared frame table, filled on first use
+    MASKS = None
+    animation_name = "on" # Fire is always burning
 
     def __init__(self, x, y):
-        super().__init__(x, y, self.FIRE_WIDTH, self.FIRE_HEIGHT, "fire")
-        self.fire = load_sprite_sheets("Traps", "Fire", 16, 32)
-        self.image = self.fire["on"][0] 
-        self.mask = pygame.mask.from_surface(self.image)
-        self.animation_count = 0
-        self.animation_name = "on" 
+        super().__init__(x, y, self.FIRE_WIDTH, self.FIRE_HEIGHT, True)
+        self.load_sprites()
 
-    def loop(self):
-        sprites = self.fire[self.animation_name]
-        sprite_index = (self.animation_count //
-                              self.ANIMATION_DELAY) % len(sprites)
-        self.image = sprites[sprite_index]
-        self.animation_count += 1
-
-        self.rect = self.image.get_rect(topleft=(self.rect.x, self.rect.y))
-        self.mask = pygame.mask.from_surface(self.image)
+    @classmethod
+    def load_sprites(cls):
+        if cls.SPRITES is None:
+            cls.SPRITES = load_sprite_sheets("Traps", "Fire", 16, 32)
+            cls.MASKS = load_sprite_masks("Traps", "Fire", 16, 32)
 
-        if self.animation_count // self.ANIMATION_DELAY >= len(sprites):
-            self.animation_count = 0
+    def animation_frames(self):
+        return self.SPRITES[self.animation_name], self.MASKS[self.animation_name]
             
             
 class Spikes(Object):
+    __slots__ = ()
+    name = "spikes"
     SPIKE_WIDTH = BLOCK_SIZE
     SPIKE_HEIGHT = BLOCK_SIZE
+    IMAGE = None # Shared by every spike trap
+    MASK = None
     
     def __init__(self, x, y):
-        super().__init__(x, y, self.SPIKE_WIDTH, self.SPIKE_HEIGHT, "spikes")
-        
-        path = get_base_path(join("assets", "Traps", "Spikes", "Idle.png"))
-        original_image = pygame.image.load(path).convert_alpha()
-        
-        scaled_image = pygame.transform.scale(original_image, (self.SPIKE_WIDTH, self.SPIKE_HEIGHT))
-        
-        self.image.blit(scaled_image, (0, 0))
-        self.mask = pygame.mask.from_surface(self.image) 
+        super().__init__(x, y, self.SPIKE_WIDTH, self.SPIKE_HEIGHT)
+        if Spikes.IMAGE is None:
+            scaled_image = load_image(join("assets", "Traps", "Spikes", "Idle.png"), size=(self.SPIKE_WIDTH, self.SPIKE_HEIGHT))
+            Spikes.IMAGE = pygame.Surface((self.SPIKE_WIDTH, self.SPIKE_HEIGHT), pygame.SRCALPHA)
+            Spikes.IMAGE.blit(scaled_image, (0, 0))
+            Spikes.MASK = pygame.mask.from_surface(Spikes.IMAGE)
+        self.image = self.IMAGE
+        self.mask = self.MASK
         
         
 class Lava(Object):
     """Represents a hazardous lava/liquid block, using the same collision logic as spikes/fire."""
+    __slots__ = ()
+    name = "lava"
     LAVA_WIDTH = BLOCK_SIZE
     LAVA_HEIGHT = BLOCK_SIZE
+    IMAGE = None # Shared by every lava tile
+    MASK = None
     
     def __init__(self, x, y):
-        super().__init__(x, y, self.LAVA_WIDTH, self.LAVA_HEIGHT, "lava")
-        
-        # Using a solid color or simple sprite for lava/toxic liquid
-        self.image.fill((255, 100, 0)) # Bright Orange/Red for lava
-        self.mask = pygame.mask.from_surface(self.image)
+        super().__init__(x, y, self.LAVA_WIDTH, self.LAVA_HEIGHT)
+        if Lava.IMAGE is None:
+            # Using a solid color or simple sprite for lava/toxic liquid
+            Lava.IMAGE = pygame.Surface((self.LAVA_WIDTH, self.LAVA_HEIGHT), pygame.SRCALPHA)
+            Lava.IMAGE.fill((255, 100, 0)) # Bright Orange/Red for lava
+            Lava.MASK = pygame.mask.from_surface(Lava.IMAGE)
+        self.image = self.IMAGE
+        self.mask = self.MASK
 
 
 class Collectible(Object):
-    def __init__(self, x, y, width, height):
-        super().__init__(x, y, width, height, "collectible")
-        # Assuming "Bananas.png" is a sheet of 32x32 frames
-        path = get_base_path(join("assets", "Items", "Fruits", "Bananas.png")) 
-        
-        sprite_sheet = pygame.image.load(path).convert_alpha()
-        
-        # Load the first frame (32x32)
-        original_width = 32
-        original_height = 32
-        
-        cropped_surface = pygame.Surface((original_width, original_height), pygame.SRCALPHA, 32)
-        crop_rect = pygame.Rect(0, 0, original_width, original_height)
-        cropped_surface.blit(sprite_sheet, (0, 0), crop_rect)
+    __slots__ = ()
+    name = "collectible"
+    IMAGE = None # Shared by every banana
+    MASK = None
 
-        # Scale it to the target size (96x96)
-        self.image = pygame.transform.scale(cropped_surface, (96, 96))
-        self.mask = pygame.mask.from_surface(self.image)
-        self.width = self.image.get_width()
-        self.height = self.image.get_height()
+    def __init__(self, x, y, width, height):
+        if Collectible.IMAGE is None:
+            # "Bananas.png" is a sheet of 32x32 frames; use the first one scaled to 96x96
+            Collectible.IMAGE = load_frames(join("assets", "Items", "Fruits", "Bananas.png"), 32, 32, scale=(96, 96))[0]
+            Collectible.MASK = pygame.mask.from_surface(Collectible.IMAGE)
+        # The rect takes the frame's size, whatever size was asked for
+        super().__init__(x, y, *self.IMAGE.get_size())
+        self.image = self.IMAGE
+        self.mask = self.MASK
 
 
 # --- START CHECKPOINT ---
-class StartCheckpoint(Object):
+class StartCheckpoint(AnimatedObject):
+    __slots__ = ("activate_on_init",)
+    name = "checkpoint"
     CHECKPOINT_FRAME_WIDTH = 64
     CHECKPOINT_FRAME_HEIGHT = 64
+    ANIMATION_DELAY = 4
+    # Shared frame table, filled on first use
+    idle_image = moving_sprites = idle_mask = moving_masks = None
     
     def __init__(self, x, y):
-        super().__init__(x, y, self.CHECKPOINT_FRAME_WIDTH * 2, self.CHECKPOINT_FRAME_HEIGHT * 2, "checkpoint")
-        
-        self.idle_image = self._load_idle_image()
-        self.moving_sprites = self._load_moving_sprites()
-        
-        self.animation_count = 0
-        self.ANIMATION_DELAY = 4 
-        self.is_active = False 
+        super().__init__(x, y, self.CHECKPOINT_FRAME_WIDTH * 2, self.CHECKPOINT_FRAME_HEIGHT * 2, False)
+        self.load_sprites()
         self.activate_on_init = False # New flag for level loading
+
+    @classmethod
+    def load_sprites(cls):
+        if cls.idle_image is None:
+            cls.idle_image = cls._load_idle_image()
+            cls.moving_sprites = cls._load_moving_sprites()
+            cls.idle_mask, cls.moving_masks = cls._load_masks()
         
-        self.image = self.idle_image
-        self.mask = pygame.mask.from_surface(self.image)
-        
-    def _load_idle_image(self):
+    @classmethod
+    def _load_idle_image(cls):
         """Loads and scales the single idle checkpoint image (64x64 -> 128x128) from Start folder."""
-        path = get_base_path(join("assets", "Items", "Checkpoints", "Start", "Start (Idle).png"))
-        image = pygame.image.load(path).convert_alpha()
-        return pygame.transform.scale2x(image)
+        return load_frames(join("assets", "Items", "Checkpoints", "Start", "Start (Idle).png"),
+                           cls.CHECKPOINT_FRAME_WIDTH, cls.CHECKPOINT_FRAME_HEIGHT)[0]
         
-    def _load_moving_sprites(self):
+    @classmethod
+    def _load_moving_sprites(cls):
         """Loads and scales the animated checkpoint sprite sheet (64x64 frames -> 128x128) from Start folder."""
-        path = get_base_path(join("assets", "Items", "Checkpoints", "Start", "Start (Moving) (64x64).png"))
-        sprite_sheet = pygame.image.load(path).convert_alpha()
-        
-        sprites = []
-        width = self.CHECKPOINT_FRAME_WIDTH
-        height = self.CHECKPOINT_FRAME_HEIGHT
-        
-        for i in range(sprite_sheet.get_width() // width):
-            surface = pygame.Surface((width, height), pygame.SRCALPHA, 32)
-            rect = pygame.Rect(i * width, 0, width, height)
-            surface.blit(sprite_sheet, (0, 0), rect)
-            sprites.append(pygame.transform.scale2x(surface))
-        return sprites
+        return load_frames(join("assets", "Items", "Checkpoints", "Start", "Start (Moving) (64x64).png"),
+                           cls.CHECKPOINT_FRAME_WIDTH, cls.CHECKPOINT_FRAME_HEIGHT)
+
+    @classmethod
+    def _load_masks(cls):
+        """Returns the idle mask and the per-frame masks of the moving animation."""
+        width, height = cls.CHECKPOINT_FRAME_WIDTH, cls.CHECKPOINT_FRAME_HEIGHT
+        idle_mask = load_frame_masks(join("assets", "Items", "Checkpoints", "Start", "Start (Idle).png"), width, height)[0]
+        moving_masks = load_frame_masks(join("assets", "Items", "Checkpoints", "Start", "Start (Moving) (64x64).png"), width, height)
+        return idle_mask, moving_masks
 
     def activate(self, player):
         """Sets the checkpoint to its active (moving) state and saves player state."""
@@ -434,110 +1159,96 @@ class StartCheckpoint(Object):
             player.respawn_y = self.rect.y - player.rect.height
             player.respawn_health = player.health
             print(f"Checkpoint activated! Respawn set to ({player.respawn_x}, {player.respawn_y})")
-        
-    def loop(self):
-        """Updates the checkpoint animation."""
-        if self.is_active:
-            sprites = self.moving_sprites
-            sprite_index = (self.animation_count //
-                             self.ANIMATION_DELAY) % len(sprites)
-            self.image = sprites[sprite_index]
-            self.animation_count += 1
-            if self.animation_count // self.ANIMATION_DELAY >= len(sprites):
-                self.animation_count = 0
-        else:
-            self.image = self.idle_image
-            
-        self.rect = self.image.get_rect(topleft=(self.rect.x, self.rect.y))
-        self.mask = pygame.mask.from_surface(self.image)
+
+    def animation_frames(self):
+        """The moving flag, shown once the checkpoint is active."""
+        return self.moving_sprites, self.moving_masks
 
 # --- END CHECKPOINT ---
-class EndCheckpoint(Object):
+class EndCheckpoint(AnimatedObject):
+    __slots__ = ()
+    name = "endpoint"
     CHECKPOINT_FRAME_WIDTH = 64
     CHECKPOINT_FRAME_HEIGHT = 64
+    ANIMATION_DELAY = 4
+    MOVES = True # Relocated to the boss when it is defeated
+    # Shared frame table, filled on first use
+    idle_image = moving_sprites = idle_mask = moving_masks = None
     
     def __init__(self, x, y):
-        super().__init__(x, y, self.CHECKPOINT_FRAME_WIDTH * 2, self.CHECKPOINT_FRAME_HEIGHT * 2, "endpoint") 
-        
-        self.idle_image = self._load_idle_image()
-        self.moving_sprites = self._load_moving_sprites() 
-        
-        self.animation_count = 0
-        self.ANIMATION_DELAY = 4 
-        self.is_active = False 
-        
-        self.image = self.idle_image
-        self.mask = pygame.mask.from_surface(self.image)
-        
-    def _load_idle_image(self):
+        super().__init__(x, y, self.CHECKPOINT_FRAME_WIDTH * 2, self.CHECKPOINT_FRAME_HEIGHT * 2, False) 
+        self.load_sprites()
+
+    @classmethod
+    def load_sprites(cls):
+        if cls.idle_image is None:
+            cls.idle_image = cls._load_idle_image()
+            cls.moving_sprites = cls._load_moving_sprites()
+            cls.idle_mask, cls.moving_masks = cls._load_masks()
+        
+    @classmethod
+    def _load_idle_image(cls):
         """Loads and scales the single idle checkpoint image (64x64 -> 128x128) from End folder."""
-        path = get_base_path(join("assets", "Items", "Checkpoints", "End", "End (Idle).png"))
-        image = pygame.image.load(path).convert_alpha()
-        return pygame.transform.scale2x(image)
+        return load_frames(join("assets", "Items", "Checkpoints", "End", "End (Idle).png"),
+                           cls.CHECKPOINT_FRAME_WIDTH, cls.CHECKPOINT_FRAME_HEIGHT)[0]
         
-    def _load_moving_sprites(self):
+    @classmethod
+    def _load_moving_sprites(cls):
         """Loads and scales the animated checkpoint sprite sheet (64x64 frames -> 128x128) from End folder."""
-        sprites = []
-        path = get_base_path(join("assets", "Items", "Checkpoints", "End", "End (Pressed) (64x64).png"))
-        
         try:
-            sprite_sheet = pygame.image.load(path).convert_alpha()
-            
-            width = self.CHECKPOINT_FRAME_WIDTH
-            height = self.CHECKPOINT_FRAME_HEIGHT
-            
-            for i in range(sprite_sheet.get_width() // width):
-                surface = pygame.Surface((width, height), pygame.SRCALPHA, 32)
-                rect = pygame.Rect(i * width, 0, width, height)
-                surface.blit(sprite_sheet, (0, 0), rect)
-                sprites.append(pygame.transform.scale2x(surface))
-        except pygame.error:
+            return load_frames(join("assets", "Items", "Checkpoints", "End", "End (Pressed) (64x64).png"),
+                               cls.CHECKPOINT_FRAME_WIDTH, cls.CHECKPOINT_FRAME_HEIGHT)
+        except (pygame.error, FileNotFoundError):
             print(f"WARNING: End Checkpoint moving sprite not found. Using idle image as fallback.")
-            sprites.append(self.idle_image)
-            
-        return sprites
+            return [cls.idle_image]
+
+    @classmethod
+    def _load_masks(cls):
+        """Returns the idle mask and the per-frame masks of the pressed animation."""
+        width, height = cls.CHECKPOINT_FRAME_WIDTH, cls.CHECKPOINT_FRAME_HEIGHT
+        idle_mask = load_frame_masks(join("assets", "Items", "Checkpoints", "End", "End (Idle).png"), width, height)[0]
+        try:
+            moving_masks = load_frame_masks(join("assets", "Items", "Checkpoints", "End", "End (Pressed) (64x64).png"), width, height)
+        except (pygame.error, FileNotFoundError):
+            moving_masks = [idle_mask]
+        return idle_mask, moving_masks
 
     def activate(self):
         self.is_active = True
-        
-    def loop(self):
-        if self.is_active:
-            sprites = self.moving_sprites
-            sprite_index = (self.animation_count //
-                             self.ANIMATION_DELAY) % len(sprites)
-            self.image = sprites[sprite_index]
-            self.animation_count += 1
-            if self.animation_count // self.ANIMATION_DELAY >= len(sprites):
-                self.animation_count = 0
-        else:
-            self.image = self.idle_image
-            
-        self.rect = self.image.get_rect(topleft=(self.rect.x, self.rect.y))
-        self.mask = pygame.mask.from_surface(self.image)
+
+    def animation_frames(self):
+        """The pressed animation, shown once the goal is reached or revealed."""
+        return self.moving_sprites, self.moving_masks
 
 
 # --- BOSS CLASS: RockHead ---
 
 class RockHead(Object):
+    __slots__ = ("health", "max_health", "animation_count", "hit", "hit_count", "current_animation",
+                 "patrol_distance", "start_x", "x_vel", "is_visible")
+    name = "rockhead_boss"
     BOSS_FRAME_WIDTH = 42
     BOSS_FRAME_HEIGHT = 42
     ANIMATION_DELAY = 5
     # Boss scale increased to 3
     BOSS_SCALE_FACTOR = 3 
+    MOVES = True
+    invincibility_time = FPS * 0.5 # 0.5 second invincibility after taking damage
+    sprites = masks = None # Shared frame table, filled on first use
     
     def __init__(self, x, y):
         # Use the new scale factor to set the object's width and height
-        super().__init__(x, y, self.BOSS_FRAME_WIDTH * self.BOSS_SCALE_FACTOR, self.BOSS_FRAME_HEIGHT * self.BOSS_SCALE_FACTOR, "rockhead_boss")
+        super().__init__(x, y, self.BOSS_FRAME_WIDTH * self.BOSS_SCALE_FACTOR, self.BOSS_FRAME_HEIGHT * self.BOSS_SCALE_FACTOR)
         self.health = 5 # Boss health
         self.max_health = 5
         self.animation_count = 0
         self.hit = False
         self.hit_count = 0
-        self.invincibility_time = FPS * 0.5 # 0.5 second invincibility after taking damage
         self.current_animation = "idle"
-        self.sprites = self._load_boss_sprites()
+        if RockHead.sprites is None:
+            RockHead.sprites, RockHead.masks = self._load_boss_sprites()
         self.image = self.sprites["idle"][0]
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = self.masks["idle"][0]
         
         # Movement/AI
         self.patrol_distance = BLOCK_SIZE * 3 # Boss patrols 3 blocks left/right
@@ -548,50 +1259,37 @@ class RockHead(Object):
         self.is_visible = True
         
     def _load_boss_sprites(self):
-        """Loads and scales the specific Rock Head sprite sheets using BOSS_SCALE_FACTOR."""
+        """
+        Loads and scales the specific Rock Head sprite sheets using BOSS_SCALE_FACTOR.
+        Returns (sprites, masks), both keyed by animation name.
+        """
         base_path = join("assets", "Traps", "Rock Head")
         
-        # Asset mapping: (filename, is_sheet)
+        # Asset mapping. Idle.png is a single 42x42 frame, so it slices like a sheet.
         sprite_data = {
-            "blink": ("Blink (42x42).png", True),
-            "bottom_hit": ("Bottom Hit (42x42).png", True),
-            "left_hit": ("Left Hit (42x42).png", True),
-            "right_hit": ("Right Hit (42x42).png", True),
-            "top_hit": ("Top Hit (42x42).png", True),
-            "idle": ("Idle.png", False) 
+            "blink": "Blink (42x42).png",
+            "bottom_hit": "Bottom Hit (42x42).png",
+            "left_hit": "Left Hit (42x42).png",
+            "right_hit": "Right Hit (42x42).png",
+            "top_hit": "Top Hit (42x42).png",
+            "idle": "Idle.png",
         }
         
         all_sprites = {}
+        all_masks = {}
         scaled_size = (self.BOSS_FRAME_WIDTH * self.BOSS_SCALE_FACTOR, self.BOSS_FRAME_HEIGHT * self.BOSS_SCALE_FACTOR)
         
-        for name, (filename, is_sheet) in sprite_data.items():
-            path = get_base_path(join(base_path, filename))
+        for name, filename in sprite_data.items():
+            relative_path = join(base_path, filename)
             
             try:
-                sprite_sheet = pygame.image.load(path).convert_alpha()
-            except pygame.error as e:
+                all_sprites[name] = load_frames(relative_path, self.BOSS_FRAME_WIDTH, self.BOSS_FRAME_HEIGHT, scale=scaled_size)
+                all_masks[name] = load_frame_masks(relative_path, self.BOSS_FRAME_WIDTH, self.BOSS_FRAME_HEIGHT, scale=scaled_size)
+            except (pygame.error, FileNotFoundError) as e:
                 print(f"Error loading boss sprite sheet {filename}: {e}")
                 continue
-
-            sprites = []
-            
-            if is_sheet:
-                # Load as a sheet of 42x42 frames
-                width, height = self.BOSS_FRAME_WIDTH, self.BOSS_FRAME_HEIGHT
-                for i in range(sprite_sheet.get_width() // width):
-                    surface = pygame.Surface((width, height), pygame.SRCALPHA, 32)
-                    rect = pygame.Rect(i * width, 0, width, height)
-                    surface.blit(sprite_sheet, (0, 0), rect)
-                    # Scale it using the new factor
-                    sprites.append(pygame.transform.scale(surface, scaled_size))
-            else:
-                # Load as a single image (Idle)
-                # Scale it using the new factor
-                sprites.append(pygame.transform.scale(sprite_sheet, scaled_size))
-                
-            all_sprites[name] = sprites
             
-        return all_sprites
+        return all_sprites, all_masks
         
     def set_animation(self, name):
         """Sets the current animation and resets the frame counter."""
@@ -622,6 +1320,103 @@ class RockHead(Object):
         print(f"Boss hit from {hit_side}! Health: {self.health}")
         return True
 
+    def catch_up(self, ticks):
+        """
+        Brings a boss that slept for ticks up to date without replaying them:
+        the patrol jumps whole legs (and whole round trips), the invincibility
+        timer runs down, and one-shot animations finish into idle. The random
+        blink is not replayed, so a sleeping boss draws no random numbers.
+        The image is refreshed by the loop() that follows waking.
+        """
+        if not self.is_visible or ticks <= 0:
+            return
+        self._advance_patrol(ticks)
+
+        if self.hit:
+            release = int(self.invincibility_time) + 1 - self.hit_count # Ticks until the timer runs out
+            if ticks < release:
+                self.hit_count += ticks
+                self._advance_animation(ticks)
+                return
+            self._advance_animation(release - 1)
+            self.hit = False
+            self.hit_count = 0
+            self.set_animation("idle")
+            ticks -= release - 1
+        self._advance_animation(ticks)
+
+    def _advance_animation(self, ticks):
+        """Advances the animation counter as ticks calls of loop() would, minus blinks."""
+        if ticks <= 0:
+            return
+        if self.current_animation != "idle":
+            remaining = len(self.sprites[self.current_animation]) * self.ANIMATION_DELAY - self.animation_count
+            if ticks < remaining:
+                self.animation_count += ticks
+                return
+            self.set_animation("idle")
+            ticks -= remaining
+        self.animation_count += ticks
+
+    def _patrol_step(self, x_vel):
+        """Pixels one patrol tick moves the rect, after Rect's rounding of the fractional velocity."""
+        probe = self.rect.copy()
+        probe.x += x_vel
+        return probe.x - self.rect.x
+
+    def _advance_patrol(self, ticks):
+        """
+        Moves the patrol forward by ticks. Between reversals the rect moves
+        a fixed number of pixels per tick, so each leg is one division; once
+        a reversal state repeats, whole round trips are skipped by modulo.
+        Rect rounds x + x_vel half away from zero, so the pixel step changes
+        where x + x_vel changes sign; a leg crossing x = 0 is split there.
+        """
+        left, right = self.start_x, self.start_x + self.patrol_distance
+        seen = {}
+        while ticks > 0:
+            x = self.rect.x
+            step = self._patrol_step(self.x_vel)
+            if step == 0 and left < x < right:
+                return # Stuck, as the per-tick loop would be
+            # Ticks until the reversal check fires (it fires on either bound, whatever the direction)
+            if x + step >= right or x + step <= left:
+                leg = 1
+            elif step > 0:
+                leg = math.ceil((right - x) / step)
+            else:
+                leg = math.ceil((x - left) / -step)
+
+            # Ticks taken before x + x_vel reaches or crosses zero, where the step is recomputed
+            edge = x + self.x_vel
+            if step == 0:
+                same = leg # Stuck on a bound: reverses in place every tick
+            elif edge == 0:
+                same = 1
+            elif (edge < 0) == (step > 0):
+                same = math.ceil(abs(edge) / abs(step))
+            else:
+                same = leg # Moving away from zero: the step holds for the whole leg
+            if same < leg:
+                run = min(same, ticks)
+                self.rect.x = x + step * run
+                ticks -= run
+                continue
+
+            if ticks < leg:
+                self.rect.x = x + step * ticks
+                return
+            self.rect.x = x + step * leg
+            self.x_vel *= -1
+            ticks -= leg
+
+            state = (self.rect.x, self.x_vel)
+            if state in seen:
+                ticks %= seen[state] - ticks # Length of one full round trip
+                seen.clear()
+            else:
+                seen[state] = ticks
+
     def loop(self):
         if not self.is_visible: # Stop all movement and animation if defeated
             return
@@ -650,6 +1445,7 @@ class RockHead(Object):
         
         sprite_index = (self.animation_count // self.ANIMATION_DELAY) % len(sprites)
         self.image = sprites[sprite_index]
+        self.mask = self.masks[self.current_animation][sprite_index]
         self.animation_count += 1
 
         # Reset animation counter for one-shot animations (Hit/Blink)
@@ -657,286 +1453,1456 @@ class RockHead(Object):
             self.set_animation("idle") 
             
         self.rect = self.image.get_rect(topleft=(self.rect.x, self.rect.y))
-        self.mask = pygame.mask.from_surface(self.image)
         
-    def draw(self, win, offset_x):
+    def draw(self, win, offset_x, offset_y=0):
         """Draws the boss, with flashing effect if it's currently hit (invincible)."""
         if not self.is_visible:
             return # Boss is hidden after defeat
             
         # Draw only if not hit or during the flash part of the hit animation (to ensure visibility)
         if not self.hit or self.hit_count // 5 % 2 == 0:
-            win.blit(self.image, (self.rect.x - offset_x, self.rect.y))
+            win.blit(self.image, (self.rect.x - offset_x, self.rect.y - offset_y))
 
+    def footprint(self, offset_x, offset_y=0):
+        if not self.is_visible or self.hit and self.hit_count // 5 % 2 != 0:
+            return None
+        return super().footprint(offset_x, offset_y)
 
-# --- Level Creation Functions ---
 
-def create_level_objects(level_id, block_size, floor_y):
+# --- Spatial Hash ---
+
+class SpatialHash:
     """
-    Creates and returns the player, object list, and starting coordinates 
-    based on the given level ID.
+    Uniform-grid broadphase with BLOCK_SIZE cells. Each object is filed under
+    every cell its rect overlaps, so collision code only has to look at the
+    objects near the player. query() returns objects in insertion order,
+    which for a streamed level is the spawn order (tiles row by row, then
+    entities); with handle_vertical_collision re-querying after each push,
+    resolution matches walking the whole level in that order. It is not the
+    order the hand-built levels listed blocks in before levels/*.json, so a
+    player pushed by two blocks in one step can land differently than then.
     """
-    objects = []
-    
-    # Common helper variables
-    player_height = 64 
-    collectible_size = 96
-    fire_y = floor_y - Fire.FIRE_HEIGHT
-    
-    start_checkpoint = StartCheckpoint(0, 0) # Temporary init
 
-    if level_id == "level_01":
-        # --- LEVEL 1: EXTENDED GAUNTLET WITH MORE TRAPS AND PLATFORMS ---
-        
-        # 1. STARTING PLATFORM & CHECKPOINT (X=0 to X=6, GRASS)
-        for i in range(7):
-            objects.append(Block(i * block_size, floor_y, block_size, "GRASS_TOP"))
-            objects.append(Block(i * block_size, floor_y + block_size, block_size, "DIRT_FILL"))
-            
-        start_checkpoint = StartCheckpoint(block_size * 1, floor_y - StartCheckpoint.CHECKPOINT_FRAME_HEIGHT * 2)
-        objects.append(start_checkpoint)
-        
-        # 2. GAP and Floating Island (X=9 to X=11)
-        island_y = floor_y - block_size * 2
-        for i in range(9, 12):
-            objects.append(Block(i * block_size, island_y, block_size, "GRASS_TOP"))
-            
-        objects.append(Collectible(block_size * 9, island_y - collectible_size, collectible_size, collectible_size)) # NEW Banana
-        objects.append(Collectible(block_size * 11, island_y - collectible_size, collectible_size, collectible_size)) # NEW Banana
+    def __init__(self, objects=(), cell_size=BLOCK_SIZE):
+        self.cell_size = cell_size
+        self.cells = {} # (cx, cy) -> {obj: None}, an insertion-ordered set
+        self.entries = {} # obj -> (insertion order, cells)
+        self.next_order = 0
+        for obj in objects:
+            self.insert(obj)
+
+    def _cells_for(self, rect):
+        size = self.cell_size
+        return tuple(
+            (cx, cy)
+            for cx in range(int(rect.left // size), int((rect.right - 1) // size) + 1)
+            for cy in range(int(rect.top // size), int((rect.bottom - 1) // size) + 1)
+        )
+
+    def insert(self, obj, order=None):
+        """Files obj; order overrides its position in query results (default: after everything so far)."""
+        if order is None:
+            order = self.next_order
+            self.next_order += 1
+        cells = self._cells_for(obj.rect)
+        self.entries[obj] = (order, cells)
+        for cell in cells:
+            self.cells.setdefault(cell, {})[obj] = None
+
+    def remove(self, obj):
+        entry = self.entries.pop(obj, None)
+        if entry is None:
+            return
+        for cell in entry[1]:
+            bucket = self.cells[cell]
+            del bucket[obj]
+            if not bucket:
+                del self.cells[cell]
+
+    def move(self, obj):
+        """Refiles an object after its rect changed. Cheap when it stays in the same cells."""
+        order, old_cells = self.entries[obj]
+        cells = self._cells_for(obj.rect)
+        if cells == old_cells:
+            return
+        self.remove(obj)
+        self.entries[obj] = (order, cells)
+        for cell in cells:
+            self.cells.setdefault(cell, {})[obj] = None
+
+    def query(self, rect, after=None):
+        """
+        Returns every object filed in a cell that rect overlaps, in insertion
+        order; with after, only those that come after that object.
+        """
+        found = {}
+        for cell in self._cells_for(rect):
+            bucket = self.cells.get(cell)
+            if bucket:
+                found.update(bucket)
+        entries = self.entries
+        if after is not None:
+            order = entries[after][0]
+            found = [obj for obj in found if entries[obj][0] > order]
+        if len(found) < 2:
+            return list(found)
+        return sorted(found, key=lambda obj: entries[obj][0])
+
+
+# --- Tile Occupancy Grid ---
+
+class TileGrid:
+    """
+    Terrain compiled into a dense NumPy array of BLOCK_SIZE cells. Each cell
+    holds the id of the block filling it (0 = empty). Blocks that are off
+    the grid (e.g. the half-block stepping stones) or that share a cell go to
+    a small overflow spatial hash. The grid origin is the most common offset
+    of the initial blocks, since the floor itself sits at HEIGHT - BLOCK_SIZE.
+    Blocks can be added and removed afterwards; the array grows as needed.
+    A streamed level passes its origin up front, since it starts empty.
+
+    Fully opaque tiles are tested against the player's per-frame mask sums
+    (no mask overlap); partly transparent tiles still use collide_mask.
+    Either way collides() agrees with the per-object mask test, and with
+    handle_vertical_collision re-querying after each push, resolution
+    matches walking every block in level order (see collision_check.py).
+
+    The player only ever overlaps a handful of cells, and slicing the array
+    costs more than that, so small queries read a dict mirror of the
+    occupied cells instead; the array serves queries over larger areas.
+    """
+    GROWTH = 16 # Extra cells allocated on each side when the array has to grow
+    SMALL_QUERY = 16 # Queries over at most this many cells use the dict mirror
+
+    def __init__(self, blocks=(), cell_size=BLOCK_SIZE, origin=None):
+        self.cell_size = cell_size
+        self.ids = {} # block -> id; ids increase in insertion (level) order
+        self.blocks = {} # id -> block
+        self.next_id = 1
+        self.opaque = set()
+        self.overflow = SpatialHash(cell_size=cell_size)
+        self.overflow_bounds = None # Union of every rect ever put in overflow
+        self.cells = np.zeros((0, 0), dtype=np.int32)
+        self.col0 = self.row0 = 0
+        self.occupied = {} # (row, col) -> id, mirroring the non-empty cells
+
+        blocks = list(blocks)
+        offsets = Counter((block.rect.x % cell_size, block.rect.y % cell_size) for block in blocks)
+        if origin is None and offsets:
+            origin = offsets.most_common(1)[0][0]
+        self.origin = origin
+        for block in blocks:
+            self.add(block)
+
+    def _cell_of(self, block):
+        rect = block.rect
+        if rect.size != (self.cell_size, self.cell_size):
+            return None
+        dx, dy = rect.x - self.origin[0], rect.y - self.origin[1]
+        if dx % self.cell_size or dy % self.cell_size:
+            return None
+        return dy // self.cell_size, dx // self.cell_size
+
+    def _ensure(self, row, col):
+        rows, cols = self.cells.shape
+        if rows and self.row0 <= row < self.row0 + rows and self.col0 <= col < self.col0 + cols:
+            return
+        if rows:
+            row0, col0 = min(self.row0, row - self.GROWTH), min(self.col0, col - self.GROWTH)
+            row1, col1 = max(self.row0 + rows, row + self.GROWTH + 1), max(self.col0 + cols, col + self.GROWTH + 1)
+        else:
+            row0, col0, row1, col1 = row, col, row + 1, col + 1
+        cells = np.zeros((row1 - row0, col1 - col0), dtype=np.int32)
+        cells[self.row0 - row0:self.row0 - row0 + rows, self.col0 - col0:self.col0 - col0 + cols] = self.cells
+        self.cells, self.row0, self.col0 = cells, row0, col0
+
+    def add(self, block, block_id=None):
+        """Adds a block; block_id (> 0, unique) overrides its level-order position."""
+        if self.origin is None:
+            self.origin = (block.rect.x % self.cell_size, block.rect.y % self.cell_size)
+        if block_id is None:
+            block_id = self.next_id
+            self.next_id += 1
+        self.ids[block] = block_id
+        self.blocks[block_id] = block
+        if block.mask.count() == self.cell_size * self.cell_size:
+            self.opaque.add(block)
+
+        cell = self._cell_of(block)
+        if cell is not None:
+            self._ensure(*cell)
+            row, col = cell[0] - self.row0, cell[1] - self.col0
+            if not self.cells[row, col]:
+                self.cells[row, col] = block_id
+                self.occupied[cell] = block_id
+                return
+        # Off-grid, odd-sized, or stacked on another block
+        self.overflow.insert(block)
+        self.overflow_bounds = block.rect.copy() if self.overflow_bounds is None else self.overflow_bounds.union(block.rect)
+
+    def remove(self, block):
+        block_id = self.ids.pop(block, None)
+        if block_id is None:
+            return
+        del self.blocks[block_id]
+        self.opaque.discard(block)
+        cell = self._cell_of(block)
+        if cell is not None:
+            row, col = cell[0] - self.row0, cell[1] - self.col0
+            if 0 <= row < self.cells.shape[0] and 0 <= col < self.cells.shape[1] and self.cells[row, col] == block_id:
+                self.cells[row, col] = 0
+                del self.occupied[cell]
+                return
+        self.overflow.remove(block)
+
+    def candidates(self, rect, after=None):
+        """Returns the terrain blocks overlapping rect, in level order; with after, only those after that block."""
+        if self.origin is None:
+            return []
+        size = self.cell_size
+        c0 = int((rect.left - self.origin[0]) // size)
+        c1 = int((rect.right - 1 - self.origin[0]) // size) + 1
+        r0 = int((rect.top - self.origin[1]) // size)
+        r1 = int((rect.bottom - 1 - self.origin[1]) // size) + 1
+
+        if (c1 - c0) * (r1 - r0) <= self.SMALL_QUERY:
+            occupied, blocks = self.occupied, self.blocks
+            found = [blocks[i] for i in (occupied.get((row, col)) for row in range(r0, r1) for col in range(c0, c1)) if i]
+        else:
+            c0, r0 = max(c0 - self.col0, 0), max(r0 - self.row0, 0)
+            c1, r1 = c1 - self.col0, r1 - self.row0
+            window = self.cells[r0:r1, c0:c1] if c1 > 0 and r1 > 0 else self.cells[0:0, 0:0]
+            found = [self.blocks[i] for i in window[window > 0].tolist()]
+        if self.overflow_bounds is not None and self.overflow_bounds.colliderect(rect):
+            found.extend(self.overflow.query(rect))
+        if after is not None:
+            position = self.ids[after]
+            found = [block for block in found if self.ids[block] > position]
+        if len(found) > 1:
+            found.sort(key=self.ids.get)
+        return found
+
+    def collides(self, player, block):
+        if block in self.opaque and player.mask_sums is not None:
+            rect = block.rect
+            return mask_hits_rect(player.mask_sums, rect.left - player.rect.left, rect.top - player.rect.top,
+                                  rect.right - player.rect.left, rect.bottom - player.rect.top)
+        return pygame.sprite.collide_mask(player, block)
+
+
+# --- Animation Table ---
+
+class AnimationTable:
+    """
+    Animation state of a world's AnimatedObjects as NumPy columns, one row
+    per entity: frame counter, frame delay, animation length, active flag
+    and the frame index on show. advance() steps every row with a handful of
+    array operations, so hundreds of fires cost about as much per tick as
+    one. Rows are kept dense: removing an entity moves the last row into
+    its place.
+
+    Rows outside the activity window (see set_window) sleep: advance()
+    leaves them alone, and when they wake, or are read while asleep, their
+    phase is caught up in closed form from the ticks they missed. An active
+    row's counter simply cycles with period delay * length.
+    """
+    COLUMNS = (("count", "int32"), ("delay", "int32"), ("length", "int32"), ("active", "bool"), ("frame", "int32"),
+               ("awake", "bool"), ("slept_at", "int64"), ("left", "int32"), ("right", "int32"))
+
+    def __init__(self, capacity=64):
+        for name, dtype in self.COLUMNS:
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+        self.entities = []
+        self.tick = 0 # Number of advance() calls so far
+        self.window = None
+
+    def __len__(self):
+        return len(self.entities)
+
+    def _grow(self):
+        for name, _ in self.COLUMNS:
+            column = getattr(self, name)
+            grown = np.zeros(len(column) * 2, dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+
+    def add(self, obj):
+        """Moves obj's animation state into a new row."""
+        row = len(self.entities)
+        if row == len(self.count):
+            self._grow()
+        self.count[row] = obj._count
+        self.delay[row] = obj.ANIMATION_DELAY
+        self.length[row] = len(obj.animation_frames()[0])
+        self.active[row] = obj._active
+        self.frame[row] = obj._frame
+        self.awake[row] = True
+        self.left[row], self.right[row] = obj.rect.left, obj.rect.right
+        self.entities.append(obj)
+        obj.table, obj.row = self, row
+        self.window = None # Re-evaluate who is awake on the next set_window()
+
+    def moved(self, obj):
+        self.left[obj.row], self.right[obj.row] = obj.rect.left, obj.rect.right
+        self.window = None
+
+    def remove(self, obj):
+        """Hands obj its state back and fills its row with the last one."""
+        row = obj.row
+        self.sync(row)
+        obj._count, obj._active, obj._frame = int(self.count[row]), bool(self.active[row]), int(self.frame[row])
+        obj.table, obj.row = None, -1
+
+        last = len(self.entities) - 1
+        moved = self.entities.pop()
+        if row != last:
+            for name, _ in self.COLUMNS:
+                column = getattr(self, name)
+                column[row] = column[last]
+            self.entities[row] = moved
+            moved.row = row
+
+    def _catch_up(self, rows):
+        """Applies the ticks rows slept through, as that many advance() calls would have."""
+        missed = self.tick - self.slept_at[rows]
+        self.slept_at[rows] = self.tick
+        idle = rows[~self.active[rows] & (missed > 0)]
+        self.frame[idle] = -1 # Inactive rows don't animate, asleep or not
+        due = self.active[rows] & (missed > 0)
+        rows, missed = rows[due], missed[due]
+        if not len(rows):
+            return
+        delay = self.delay[rows]
+        period = delay * self.length[rows]
+        count = (self.count[rows] + missed) % period
+        self.count[rows] = count
+        self.frame[rows] = ((count - 1) % period) // delay # Frame shown by the last missed tick
+
+    def sync(self, row):
+        """Catches up one sleeping row (it stays asleep); a no-op for awake rows."""
+        if not self.awake[row]:
+            self._catch_up(np.array([row]))
+
+    def set_window(self, left, right):
+        """Wakes the rows overlapping [left, right) and puts the rest to sleep."""
+        if self.window == (left, right):
+            return
+        self.window = (left, right)
+        n = len(self.entities)
+        awake = self.awake[:n]
+        inside = (self.right[:n] > left) & (self.left[:n] < right)
+        waking = np.flatnonzero(inside & ~awake)
+        if len(waking):
+            self._catch_up(waking)
+        self.slept_at[:n][awake & ~inside] = self.tick
+        awake[:] = inside
+
+    def advance(self):
+        """One animation tick for every awake row, matching AnimatedObject.loop()."""
+        self.tick += 1
+        n = len(self.entities)
+        if not n:
+            return
+        count, delay, length, active, awake = self.count[:n], self.delay[:n], self.length[:n], self.active[:n], self.awake[:n]
+        ticks = count // delay
+        self.frame[:n] = np.where(awake, np.where(active, ticks % length, -1), self.frame[:n])
+        count += active & awake
+        count[count // delay >= length] = 0
 
-        # 3. MIDDLE PLATFORM (X=15 to X=18) - Higher jump to reach
-        middle_platform_y = floor_y - block_size * 4
-        for i in range(15, 19): 
-            objects.append(Block(i * block_size, middle_platform_y, block_size, "GRASS_TOP"))
-            
-        objects.append(Collectible(block_size * 16, middle_platform_y - collectible_size, collectible_size, collectible_size))
-        objects.append(Collectible(block_size * 17, middle_platform_y - collectible_size, collectible_size, collectible_size)) # NEW Banana
 
-        # 4. Stepping Stones Gap (X=21 to X=26)
-        # Small floating blocks requiring precise jumps over a pit (floor assumed).
-        
-        # Stone 1 (Low)
-        stone1_y = floor_y - block_size * 1.5
-        objects.append(Block(block_size * 21, stone1_y, block_size, "STONE_TOP"))
-        objects.append(Collectible(block_size * 21, stone1_y - collectible_size, collectible_size, collectible_size)) # NEW Banana
-        
-        # Stone 2 (High)
-        stone2_y = floor_y - block_size * 3.5
-        objects.append(Block(block_size * 24, stone2_y, block_size, "STONE_TOP"))
-        
-        # Stone 3 (Medium)
-        stone3_y = floor_y - block_size * 2.5
-        objects.append(Block(block_size * 26, stone3_y, block_size, "STONE_TOP"))
+# --- World ---
 
+class World:
+    """
+    Every entity of a running level, kept in per-kind buckets that are
+    updated as entities are added or removed. Buckets are insertion-ordered
+    dicts used as sets, so removal is O(1) and iteration keeps level order.
+    The world also owns the derived structures: spatial hash, culling index,
+    baked terrain chunks and (with NumPy) the tile occupancy grid. A streamed
+    level also has a LevelStream in self.stream, which adds and evicts
+    entities as the camera moves.
+
+    Animated entities loop() one by one until there are TABLE_THRESHOLD of
+    them; from then on (with NumPy) they move into an AnimationTable, which
+    only pays off over its fixed per-tick cost with that many rows.
+    """
+    TABLE_THRESHOLD = 32
+    # How far the drawn camera can be from the one a step animates for (interpolation, knockback)
+    CAMERA_SLACK = BLOCK_SIZE // 2
+    # obj.name -> bucket
+    KINDS = {
+        "block": "solids",
+        "fire": "hazards",
+        "spikes": "hazards",
+        "lava": "hazards",
+        "collectible": "collectibles",
+        "checkpoint": "checkpoints",
+        "endpoint": "checkpoints",
+        "rockhead_boss": "bosses",
+    }
 
-        # 5. Fire Gauntlet Platform (X=28 to X=31) - Requires timing
-        fire_platform_y = floor_y - block_size 
-        for i in range(28, 32): 
-            objects.append(Block(i * block_size, fire_platform_y, block_size, "DIRT_FILL"))
-            
-        objects.append(Collectible(block_size * 28, fire_platform_y - collectible_size, collectible_size, collectible_size)) # NEW Banana
-        objects.append(Fire(block_size * 29, fire_platform_y - Fire.FIRE_HEIGHT))
-        objects.append(Fire(block_size * 30 + Fire.FIRE_WIDTH, fire_platform_y - Fire.FIRE_HEIGHT))
+    def __init__(self, entities=(), grid_origin=None, activity_margin=None):
+        self.entities = {}
+        self.solids = {}
+        self.hazards = {}
+        self.collectibles = {}
+        self.checkpoints = {}
+        self.bosses = {}
+        self.animated = {} # Entities with a loop() method, other than those in the animation table
+        self.animations = None # AnimationTable, once there are TABLE_THRESHOLD animated entities
+        self.asleep = {} # Sleeping entities of self.animated -> tick they fell asleep
+        self.previous = {} # Moving entities -> (x, y) before their last step, for interpolated drawing
+        self.activity_margin = ACTIVITY_MARGIN if activity_margin is None else activity_margin
+        self.tick = 0
+        self.spatial_hash = SpatialHash()
+        self.index = CullingIndex(()) # Everything except terrain, for draw culling
+        entities = list(entities)
+        self.terrain = TerrainChunks(obj for obj in entities if obj.name == "block")
+        self.tile_grid = None
+        if np is not None:
+            self.tile_grid = TileGrid((obj for obj in entities if obj.name == "block"), origin=grid_origin)
+        self.stream = None
+        self.level_width = None # Scrollable width for the camera clamp, set by step_level()
+        for obj in entities:
+            self._file(obj)
+
+    def _file(self, obj, order=None):
+        self.entities[obj] = None
+        bucket = self.KINDS.get(obj.name)
+        if bucket is not None:
+            getattr(self, bucket)[obj] = None
+        if self.animations is not None and isinstance(obj, AnimatedObject):
+            self.animations.add(obj)
+        elif hasattr(obj, "loop"):
+            self.animated[obj] = None
+            if np is not None and isinstance(obj, AnimatedObject):
+                self._maybe_tabulate()
+        self.spatial_hash.insert(obj, order)
+        if obj.name != "block":
+            self.index.add(obj)
+
+    def _maybe_tabulate(self):
+        """Moves the animated entities into an AnimationTable once there are enough of them."""
+        loose = [obj for obj in self.animated if isinstance(obj, AnimatedObject)]
+        if len(loose) < self.TABLE_THRESHOLD:
+            return
+        self.animations = AnimationTable()
+        for obj in loose:
+            slept_at = self.asleep.pop(obj, None)
+            if slept_at is not None:
+                obj.catch_up(self.tick - slept_at)
+            del self.animated[obj]
+            self.animations.add(obj)
+
+    def add(self, obj, order=None):
+        """Adds an entity; order (>= 0) fixes its place in collision order, e.g. its index in the level."""
+        self._file(obj, order)
+        if obj.name == "block":
+            self.terrain.add(obj)
+            if self.tile_grid is not None:
+                self.tile_grid.add(obj, None if order is None else order + 1)
+
+    def remove(self, obj):
+        """Removes an entity for good (e.g. a collected banana); a streamed level will not bring it back."""
+        if self.stream is not None:
+            self.stream.forget(obj)
+        self.evict(obj)
+
+    def evict(self, obj):
+        """Drops an entity from every structure, without recording it as gone from the level."""
+        if self.entities.pop(obj, False) is False:
+            return
+        bucket = self.KINDS.get(obj.name)
+        if bucket is not None:
+            getattr(self, bucket).pop(obj, None)
+        self.animated.pop(obj, None)
+        self.asleep.pop(obj, None)
+        self.previous.pop(obj, None)
+        if isinstance(obj, AnimatedObject) and obj.table is not None:
+            obj.table.remove(obj)
+        self.spatial_hash.remove(obj)
+        if obj.name == "block":
+            self.terrain.remove(obj)
+            if self.tile_grid is not None:
+                self.tile_grid.remove(obj)
+        else:
+            self.index.remove(obj)
+
+    def moved(self, obj):
+        """
+        Call after an entity's rect changed so the spatial hash stays correct.
+        The move counts as a jump: the entity is drawn at its new place at once.
+        """
+        self.previous.pop(obj, None)
+        self._refile(obj)
+
+    def _refile(self, obj):
+        self.spatial_hash.move(obj)
+        if isinstance(obj, AnimatedObject) and obj.table is not None:
+            obj.table.moved(obj)
+
+    def draw_offset(self, obj, offset_x, alpha):
+        """
+        (offset_x, offset_y) that draws obj where it was alpha of the way
+        through its last step, so moving entities are interpolated like the player.
+        """
+        previous = self.previous.get(obj)
+        if previous is None:
+            return offset_x, 0
+        x, y = obj.rect.topleft
+        return (offset_x + x - round(previous[0] + (x - previous[0]) * alpha),
+                y - round(previous[1] + (y - previous[1]) * alpha))
+
+    def update(self, offset_x):
+        """
+        Advances every animated entity by one tick, for a camera at offset_x.
+        Entities further than activity_margin outside the camera sleep and
+        are skipped; when they come back into range they are caught up from
+        the ticks they missed (table rows in closed form, others through
+        their catch_up()). Entities without catch_up() never sleep.
+        """
+        margin = self.activity_margin + self.CAMERA_SLACK
+        left, right = offset_x - margin, offset_x + WIDTH + margin
+        if self.animations is not None:
+            self.animations.set_window(left, right)
+            self.animations.advance()
+
+        for obj in self.animated:
+            if obj.rect.right > left and obj.rect.left < right or not hasattr(obj, "catch_up"):
+                slept_at = self.asleep.pop(obj, None)
+                if slept_at is not None:
+                    obj.catch_up(self.tick - slept_at)
+                if obj.MOVES:
+                    self.previous[obj] = obj.rect.topleft
+                obj.loop()
+                if obj.MOVES:
+                    self._refile(obj)
+            elif obj not in self.asleep:
+                self.asleep[obj] = self.tick
+                self.previous.pop(obj, None)
+        self.tick += 1
 
+    def __iter__(self):
+        return iter(self.entities)
 
-        # 6. Spikes Platform (X=33 to X=36) - Requires cautious landing/movement
-        spike_platform_y = floor_y - block_size * 2
-        
-        for i in range(33, 37): # Platform from 33 to 36
-            objects.append(Block(i * block_size, spike_platform_y, block_size, "STONE_TOP"))
-            
-        # Add Spikes
-        spikes_y = spike_platform_y - Spikes.SPIKE_HEIGHT 
-        objects.append(Spikes(block_size * 34, spikes_y))
-        objects.append(Spikes(block_size * 35, spikes_y))
-        
-        objects.append(Collectible(block_size * 33, spikes_y - collectible_size, collectible_size, collectible_size)) # Existing Banana
+    def __len__(self):
+        return len(self.entities)
 
+    @property
+    def boss(self):
+        return next(iter(self.bosses), None)
 
-        # 7. Double Fire Jump (X=38 to X=41) - Long jump over gap with fires
-        # The landing platform is at X=41
-        objects.append(Block(block_size * 41, floor_y, block_size, "GRASS_TOP"))
-        objects.append(Block(block_size * 41, floor_y + block_size, block_size, "DIRT_FILL"))
-        
-        objects.append(Collectible(block_size * 41, floor_y - collectible_size - 10, collectible_size, collectible_size)) # NEW Banana
-        
-        # Two fires in the pit 
-        objects.append(Fire(block_size * 38, fire_y))
-        objects.append(Fire(block_size * 39 + Fire.FIRE_WIDTH, fire_y))
+    @property
+    def endpoint(self):
+        return next((obj for obj in self.checkpoints if obj.name == "endpoint"), None)
 
 
-        # 8. Lava Pit Jump (X=43 to X=46) - Final big hazard
-        # Fill the floor below this section with lava (death pit)
-        for i in range(43, 47):
-            objects.append(Lava(i * block_size, floor_y))
-        
-        
-        # 9. FINAL PLATFORM (X=47 to X=49) and END CHECKPOINT
-        final_platform_y = floor_y - block_size * 2
-        for i in range(47, 50):
-            objects.append(Block(i * block_size, final_platform_y, block_size, "STONE_TOP"))
-            
-        end_checkpoint_height = EndCheckpoint.CHECKPOINT_FRAME_HEIGHT * 2 
-        end_checkpoint_x = block_size * 48 
-        end_checkpoint_y = final_platform_y - end_checkpoint_height
-        end_checkpoint = EndCheckpoint(end_checkpoint_x, end_checkpoint_y)
-        objects.append(end_checkpoint)
-        
-        # Set player spawn location for this level
-        start_x = block_size + 20
-        start_y = floor_y - player_height
-        start_checkpoint.activate_on_init = True
-        
-        
-    elif level_id == "level_02":
-        # --- LEVEL 2: TRAP GAUNTLET LEADING TO ROCKHEAD BOSS ARENA ---
-        
-        # Level dimensions 
-        TRAP_SECTION_END = 8 # Blocks 0-7
-        GAP_START = 8
-        ARENA_START = 10     # Blocks 10-15
-        ARENA_END = 15
-        
-        # 1. TRAP SECTION GROUND (X=0 to X=8)
-        for i in range(TRAP_SECTION_END):
-            objects.append(Block(i * block_size, floor_y, block_size, "STONE_TOP"))
-            objects.append(Block(i * block_size, floor_y + block_size, block_size, "STONE_FILL"))
-            
-        start_x = block_size * 1
-        start_y = floor_y - player_height
-        
-        # START CHECKPOINT
-        start_checkpoint = StartCheckpoint(start_x - 50, floor_y - StartCheckpoint.CHECKPOINT_FRAME_HEIGHT * 2)
-        objects.append(start_checkpoint)
-        start_checkpoint.activate_on_init = True
-        
-        # TRAP SECTION ELEMENTS 
-        spikes_height = Spikes.SPIKE_HEIGHT
-        
-        # Floating Platform 1 (High, for jumping over the spike pit)
-        platform1_y = floor_y - block_size * 3
-        objects.append(Block(block_size * 3, platform1_y, block_size, "STONE_TOP"))
-        objects.append(Collectible(block_size * 3, platform1_y - collectible_size, collectible_size, collectible_size)) # Banana 1
-        
-        # Spike Pit 
-        objects.append(Spikes(block_size * 5, floor_y - spikes_height))
-        objects.append(Spikes(block_size * 6, floor_y - spikes_height))
-        objects.append(Collectible(block_size * 5, floor_y - spikes_height - collectible_size, collectible_size, collectible_size)) # Banana 2
-        
-        # Final platform of the trap section (Block 7)
-        objects.append(Block(block_size * 7, floor_y, block_size, "STONE_TOP"))
-        objects.append(Collectible(block_size * 7, floor_y - collectible_size, collectible_size, collectible_size)) # Banana 3
-        
-        # 2. BOSS ARENA PLATFORM (X=10 to X=15) - Dedicated Boss Fight Zone
-        for i in range(ARENA_START, ARENA_END + 1): 
-            objects.append(Block(i * block_size, floor_y, block_size, "STONE_TOP"))
-            objects.append(Block(i * block_size, floor_y + block_size, block_size, "STONE_FILL"))
-        
-        # Arena Platforms (for combat mobility)
-        objects.append(Block(block_size * 13, floor_y - block_size * 2, block_size, "STONE_TOP")) # Low platform
-        objects.append(Block(block_size * 11, floor_y - block_size * 4, block_size, "STONE_TOP")) # High platform
-        
-        # Arena Traps (Fire at both ends)
-        fire_y = floor_y - Fire.FIRE_HEIGHT
-        objects.append(Fire(block_size * 10, fire_y))
-        objects.append(Fire(block_size * 15, fire_y)) 
-        
-        # 3. BOSS PLACEMENT (Center of the new arena section)
-        boss = RockHead(0, 0) 
-        
-        boss_x = block_size * 12
-        boss_y = floor_y - boss.height 
-        
-        boss.rect.x = boss_x
-        boss.rect.y = boss_y
-        boss.start_x = boss_x - block_size * 1.5 
-        boss.patrol_distance = BLOCK_SIZE * 3 
-        objects.append(boss)
-        
-        # 4. Hidden End Goal (Placed off-screen, activated upon boss defeat)
-        end_checkpoint = EndCheckpoint(-500, -500)
-        objects.append(end_checkpoint)
-        
+# --- Level Streaming ---
+
+SEGMENT_WIDTH = BLOCK_SIZE * 16 # Width of the x-slices a streamed level is loaded and evicted in
+STREAM_PREFETCH = WIDTH # Segments are loaded this far ahead of the right screen edge...
+STREAM_KEEP_BEHIND = WIDTH # ...and kept until they are this far behind the left one
+
+
+class LevelStream:
+    """
+    Keeps only the part of a level around the camera instantiated. Spawns
+    (see level_spawns) are grouped into SEGMENT_WIDTH slices by their left
+    edge; stream_to() instantiates the segments within reach of the camera
+    and evicts those that fell out of reach, so resident objects and the
+    per-frame loops stay bounded however long the level is.
+
+    Entities that move (the boss, the goal that jumps to it) are pinned and
+    live for the whole level. Eviction keeps the level's persistent state:
+    collected bananas never come back and activated start checkpoints
+    reload active.
+    """
+
+    def __init__(self, world, spawns, block_size=BLOCK_SIZE, segment_width=SEGMENT_WIDTH,
+                 prefetch=STREAM_PREFETCH, keep_behind=STREAM_KEEP_BEHIND):
+        self.world = world
+        self.spawns = spawns
+        self.block_size = block_size
+        self.segment_width = segment_width
+        self.prefetch = prefetch
+        self.keep_behind = keep_behind
+
+        self.segments = {} # segment -> [spawn index]
+        self.live = {} # segment -> {spawn index: obj}, for loaded segments
+        self.index_of = {} # obj -> spawn index
+        self.consumed = set() # Spawn indices removed from the level for good
+        self.activated = set() # Spawn indices of start checkpoints evicted while active
+        self.span = None
+
+        pinned = []
+        for i, (kind, x, _, _) in enumerate(spawns):
+            if SPAWN_CLASSES[kind].MOVES:
+                pinned.append(i)
+            else:
+                self.segments.setdefault(int(x // segment_width), []).append(i)
+
+        # Right edge of the level's terrain and goal, for the camera clamp
+        self.right = max((x + entity_size(kind, block_size)[0] for kind, x, _, _ in spawns
+                          if kind in ("Block", "EndCheckpoint")), default=WIDTH)
+
+        for i in pinned:
+            self._spawn(i, None)
+
+    def _spawn(self, i, segment):
+        obj = spawn_object(self.spawns[i], self.block_size)
+        if i in self.activated:
+            obj.is_active = True # Restored silently; the player's respawn point is already set
+        self.index_of[obj] = i
+        if segment is not None:
+            self.live[segment][i] = obj
+        self.world.add(obj, i)
+
+    def _load(self, segment):
+        self.live[segment] = {}
+        for i in self.segments[segment]:
+            if i not in self.consumed:
+                self._spawn(i, segment)
+
+    def _evict(self, segment):
+        for i, obj in self.live.pop(segment).items():
+            if obj.name == "checkpoint" and obj.is_active:
+                self.activated.add(i)
+            del self.index_of[obj]
+            self.world.evict(obj)
+
+    def forget(self, obj):
+        """Records that obj left the level for good (called by World.remove)."""
+        i = self.index_of.pop(obj, None)
+        if i is None:
+            return
+        self.consumed.add(i)
+        for live in self.live.values():
+            live.pop(i, None)
+
+    def stream_to(self, offset_x):
+        """Loads and evicts segments for a camera at offset_x. Cheap when no segment boundary was crossed."""
+        first = int((offset_x - self.keep_behind) // self.segment_width)
+        last = int((offset_x + WIDTH + self.prefetch) // self.segment_width)
+        if (first, last) == self.span:
+            return
+        self.span = (first, last)
+        # One segment of slack on either side, so walking back and forth over a boundary doesn't thrash
+        for segment in [s for s in self.live if s < first - 1 or s > last + 1]:
+            self._evict(segment)
+        for segment in range(first, last + 1):
+            if segment in self.segments and segment not in self.live:
+                self._load(segment)
+
+
+# --- Level Files ---
+# A level is a JSON file in levels/: tile rows for grid-aligned terrain plus an
+# entity list for everything else.
+#
+#   "legend":    tile character -> Block terrain key, or "Lava"; "." is empty
+#   "floor_row": index of the tile row whose top is the floor surface (floor_y)
+#   "tiles":     rows of characters, top row first, one character per block column
+#   "player":    spawn point
+#   "entities":  {"type": "Fire", "x": 29, "y": 1, ...} in level order
+#
+# Positions are in blocks: x is the left edge, y the height of the bottom edge
+# above the floor surface (halves allowed), and dx/dy are extra pixel offsets
+# (dy down). Type-specific fields: "terrain" for Block, "active" for a
+# StartCheckpoint that is activated on load, "hidden" for an EndCheckpoint
+# placed off-screen until the boss falls, and "patrol_start"/"patrol" (in
+# blocks, relative to x) for RockHead.
+#
+# Each file is compiled once into a binary cache in levels/.cache/ (a header
+# plus flat typed arrays) that later loads read back in bulk. The cache is
+# rebuilt when the source's mtime and content hash both change.
+
+LEVEL_DIR = "levels"
+LEVEL_CACHE_DIR = join(LEVEL_DIR, ".cache")
+LEVEL_CACHE_MAGIC = b"UGLV"
+LEVEL_CACHE_VERSION = 1
+# Header: magic, version, source mtime_ns, source sha1, width, height, floor row,
+# entity count, player x, player y, player dx, player dy
+LEVEL_CACHE_HEADER = struct.Struct("=4sHq20sHHHIffhh")
+
+TILE_KINDS = (None,) + tuple(Block.TERRAIN_TYPES) + ("Lava",) # Tile code -> terrain key
+ENTITY_KINDS = ("Block", "Fire", "Spikes", "Lava", "Collectible", "StartCheckpoint", "EndCheckpoint", "RockHead")
+ENTITY_ACTIVE = 1
+ENTITY_HIDDEN = 2
+
+PLAYER_HEIGHT = 64 # Height the spawn point is anchored with, as in the original levels
+COLLECTIBLE_SIZE = 96
+
+# Entity arrays in file order: (attribute, typecode)
+LEVEL_ENTITY_ARRAYS = (
+    ("kinds", "B"), ("terrains", "B"), ("flags", "B"),
+    ("xs", "f"), ("ys", "f"), ("dxs", "h"), ("dys", "h"),
+    ("patrol_starts", "f"), ("patrols", "f"),
+)
+
+
+class CompiledLevel:
+    """A level as flat typed arrays: tile codes row by row and one slot per entity in each entity array."""
+
+    def __init__(self, width, height, floor_row, player):
+        self.width = width
+        self.height = height
+        self.floor_row = floor_row
+        self.player = player # (x, y, dx, dy)
+        self.tiles = array("B", bytes(width * height))
+        for name, typecode in LEVEL_ENTITY_ARRAYS:
+            setattr(self, name, array(typecode))
+
+    def __len__(self):
+        return len(self.kinds)
+
+
+def compile_level(source):
+    """Parses a level JSON document (str or bytes) into a CompiledLevel. Raises ValueError on bad content."""
+    data = json.loads(source)
+
+    codes = {".": 0, " ": 0}
+    for char, kind in data.get("legend", {}).items():
+        if kind not in TILE_KINDS[1:]:
+            raise ValueError(f"Unknown tile kind {kind!r} for {char!r}")
+        codes[char] = TILE_KINDS.index(kind)
+
+    rows = data.get("tiles", [])
+    width = max((len(row) for row in rows), default=0)
+    player = data.get("player", {})
+    level = CompiledLevel(width, len(rows), data.get("floor_row", len(rows) - 1),
+                          (player.get("x", 1), player.get("y", 0), player.get("dx", 0), player.get("dy", 0)))
+
+    for r, row in enumerate(rows):
+        for c, char in enumerate(row):
+            if char not in codes:
+                raise ValueError(f"Tile {char!r} in row {r} is not in the legend")
+            level.tiles[r * width + c] = codes[char]
+
+    for entity in data.get("entities", []):
+        kind = entity.get("type")
+        if kind not in ENTITY_KINDS:
+            raise ValueError(f"Unknown entity type {kind!r}")
+        terrain = entity.get("terrain", "GRASS_TOP")
+        if terrain not in Block.TERRAIN_TYPES:
+            raise ValueError(f"Unknown terrain {terrain!r}")
+        level.kinds.append(ENTITY_KINDS.index(kind))
+        level.terrains.append(TILE_KINDS.index(terrain))
+        level.flags.append((ENTITY_ACTIVE if entity.get("active") else 0) |
+                           (ENTITY_HIDDEN if entity.get("hidden") else 0))
+        level.xs.append(entity.get("x", 0))
+        level.ys.append(entity.get("y", 0))
+        level.dxs.append(entity.get("dx", 0))
+        level.dys.append(entity.get("dy", 0))
+        level.patrol_starts.append(entity.get("patrol_start", 0))
+        level.patrols.append(entity.get("patrol", 3))
+    return level
+
+
+def write_level_cache(level, path, mtime_ns, digest):
+    os.makedirs(dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(LEVEL_CACHE_HEADER.pack(LEVEL_CACHE_MAGIC, LEVEL_CACHE_VERSION, mtime_ns, digest,
+                                        level.width, level.height, level.floor_row, len(level), *level.player))
+        level.tiles.tofile(f)
+        for name, _ in LEVEL_ENTITY_ARRAYS:
+            getattr(level, name).tofile(f)
+
+
+def read_level_cache(path):
+    """Returns (level, mtime_ns, digest), or None if the cache is missing, stale in format or truncated."""
+    try:
+        with open(path, "rb") as f:
+            header = f.read(LEVEL_CACHE_HEADER.size)
+            if len(header) < LEVEL_CACHE_HEADER.size:
+                return None
+            magic, version, mtime_ns, digest, width, height, floor_row, count, *player = LEVEL_CACHE_HEADER.unpack(header)
+            if magic != LEVEL_CACHE_MAGIC or version != LEVEL_CACHE_VERSION:
+                return None
+            level = CompiledLevel(width, height, floor_row, tuple(player))
+            level.tiles = array("B")
+            level.tiles.fromfile(f, width * height)
+            for name, _ in LEVEL_ENTITY_ARRAYS:
+                getattr(level, name).fromfile(f, count)
+    except (OSError, EOFError, struct.error):
+        return None
+    return level, mtime_ns, digest
+
+
+def load_level(level_id):
+    """
+    Returns the CompiledLevel for levels/<level_id>.json, from the binary
+    cache when it is still current. Raises FileNotFoundError for unknown levels.
+    """
+    source_path = get_base_path(join(LEVEL_DIR, level_id + ".json"))
+    cache_path = get_base_path(join(LEVEL_CACHE_DIR, level_id + ".bin"))
+    mtime_ns = os.stat(source_path).st_mtime_ns
+
+    cached = read_level_cache(cache_path)
+    if cached and cached[1] == mtime_ns:
+        return cached[0]
+
+    with open(source_path, "rb") as f:
+        source = f.read()
+    digest = hashlib.sha1(source).digest()
+    if cached and cached[2] == digest:
+        level = cached[0] # Touched but unchanged: only the recorded mtime is refreshed
     else:
-        # Fallback to level 1 if an invalid ID is used
-        return create_level_objects("level_01", block_size, floor_y)
+        level = compile_level(source)
 
-    # Initialize player outside the specific level block so we can set the start position
-    player = Player(start_x, start_y, 50, 50) 
+    try:
+        write_level_cache(level, cache_path, mtime_ns, digest)
+    except OSError as e:
+        print(f"Warning: could not write level cache {cache_path}: {e}")
+    return level
+
+
+def entity_size(kind, block_size):
+    """(width, height) of an entity of this kind; the height stands it on its y."""
+    return {
+        "Block": (block_size, block_size),
+        "Lava": (block_size, block_size),
+        "Fire": (Fire.FIRE_WIDTH, Fire.FIRE_HEIGHT),
+        "Spikes": (Spikes.SPIKE_WIDTH, Spikes.SPIKE_HEIGHT),
+        "Collectible": (COLLECTIBLE_SIZE, COLLECTIBLE_SIZE),
+        "StartCheckpoint": (StartCheckpoint.CHECKPOINT_FRAME_WIDTH * 2, StartCheckpoint.CHECKPOINT_FRAME_HEIGHT * 2),
+        "EndCheckpoint": (EndCheckpoint.CHECKPOINT_FRAME_WIDTH * 2, EndCheckpoint.CHECKPOINT_FRAME_HEIGHT * 2),
+        "RockHead": (RockHead.BOSS_FRAME_WIDTH * RockHead.BOSS_SCALE_FACTOR,
+                     RockHead.BOSS_FRAME_HEIGHT * RockHead.BOSS_SCALE_FACTOR),
+    }[kind]
+
+
+def level_spawns(level, block_size, floor_y):
+    """
+    Resolves a CompiledLevel to pixel positions without instantiating
+    anything. Returns (kind, x, y, extra) spawns in level order: tiles row
+    by row, then entities. extra is the terrain key of a Block, the
+    activate-on-load flag of a StartCheckpoint and (start_x, patrol
+    distance) of a RockHead.
+    """
+    spawns = []
+
+    for r in range(level.height):
+        top = floor_y + (r - level.floor_row) * block_size
+        row = level.tiles[r * level.width:(r + 1) * level.width]
+        for c, code in enumerate(row):
+            if code == 0:
+                continue
+            kind = TILE_KINDS[code]
+            if kind == "Lava":
+                spawns.append(("Lava", c * block_size, top, None))
+            else:
+                spawns.append(("Block", c * block_size, top, kind))
+
+    for i, code in enumerate(level.kinds):
+        kind = ENTITY_KINDS[code]
+        x = level.xs[i] * block_size + level.dxs[i]
+        y = floor_y - level.ys[i] * block_size - entity_size(kind, block_size)[1] + level.dys[i]
+        flags = level.flags[i]
+        extra = None
+
+        if kind == "Block":
+            extra = TILE_KINDS[level.terrains[i]]
+        elif kind == "StartCheckpoint":
+            extra = bool(flags & ENTITY_ACTIVE)
+        elif kind == "EndCheckpoint" and flags & ENTITY_HIDDEN:
+            x, y = -500, -500 # A hidden goal waits off-screen until the boss is defeated
+        elif kind == "RockHead":
+            extra = (x + level.patrol_starts[i] * block_size, level.patrols[i] * block_size)
+        spawns.append((kind, x, y, extra))
+    return spawns
+
+
+SPAWN_CLASSES = {
+    "Block": Block,
+    "Lava": Lava,
+    "Fire": Fire,
+    "Spikes": Spikes,
+    "Collectible": Collectible,
+    "StartCheckpoint": StartCheckpoint,
+    "EndCheckpoint": EndCheckpoint,
+    "RockHead": RockHead,
+}
+
+
+def spawn_object(spawn, block_size):
+    """Instantiates one (kind, x, y, extra) spawn."""
+    kind, x, y, extra = spawn
+    if kind == "Block":
+        return Block(x, y, block_size, extra)
+    if kind == "Collectible":
+        return Collectible(x, y, COLLECTIBLE_SIZE, COLLECTIBLE_SIZE)
+    obj = SPAWN_CLASSES[kind](x, y)
+    if kind == "StartCheckpoint":
+        obj.activate_on_init = extra
+    elif kind == "RockHead":
+        obj.start_x, obj.patrol_distance = extra
+    return obj
+
+
+def level_kinds(level):
+    """The spawn kinds a CompiledLevel instantiates (see level_spawns)."""
+    kinds = {ENTITY_KINDS[code] for code in set(level.kinds)}
+    kinds.update("Lava" if TILE_KINDS[code] == "Lava" else "Block" for code in set(level.tiles) if code)
+    return kinds
+
+
+def level_start(level, block_size, floor_y):
+    """Player spawn point of a CompiledLevel in pixels."""
+    px, py, pdx, pdy = level.player
+    return px * block_size + pdx, floor_y - py * block_size - PLAYER_HEIGHT + pdy
+
+
+def build_level_objects(level, block_size, floor_y):
+    """Instantiates a whole CompiledLevel at once. Returns (objects, start_x, start_y)."""
+    objects = [spawn_object(spawn, block_size) for spawn in level_spawns(level, block_size, floor_y)]
+    return (objects, *level_start(level, block_size, floor_y))
+
+
+def build_world(spawns, player, block_size, floor_y):
+    """
+    Creates the streamed World for a level's spawns, loaded around the
+    player's start, and activates its start checkpoints.
+    """
+    world = World(grid_origin=(0, floor_y % block_size))
+    world.stream = LevelStream(world, spawns, block_size)
+    world.stream.stream_to(player.rect.centerx - WIDTH // 2)
     
     # Manually activate the start checkpoint on level load for initial respawn setup
-    if start_checkpoint.activate_on_init:
-        start_checkpoint.activate(player)
+    for obj in list(world.checkpoints):
+        if obj.name == "checkpoint" and obj.activate_on_init:
+            obj.activate(player)
+    return world
+
+
+# --- Level Creation Functions ---
+
+def create_level_objects(level_id, block_size, floor_y):
+    """
+    Creates and returns the player, the World holding the level's objects,
+    and starting coordinates, loading the level from its file in levels/.
+    """
+    try:
+        level = load_level(level_id)
+    except FileNotFoundError:
+        if level_id == LEVEL_IDS[0]:
+            raise
+        # Fallback to level 1 if an invalid ID is used
+        return create_level_objects(LEVEL_IDS[0], block_size, floor_y)
+
+    start_x, start_y = level_start(level, block_size, floor_y)
+
+    # Initialize player before the world, since the world is streamed in around it
+    player = Player(start_x, start_y, 50, 50) 
+    world = build_world(level_spawns(level, block_size, floor_y), player, block_size, floor_y)
         
-    return player, objects, player.respawn_x, player.respawn_y
+    return player, world, player.respawn_x, player.respawn_y
 
 
 # --- Game Functions ---
 
-def get_background(name):
+class BackgroundLayer:
+    """
+    The tiled background composited once into a single opaque strip, one
+    tile wider than the screen. Drawing it is a single blit; with parallax
+    the strip is shifted by a fraction of the camera offset, wrapping
+    every tile width, so it never has to be re-tiled.
+    """
+
+    def __init__(self, strip, tile_width, parallax=0.0):
+        self.strip = strip
+        self.tile_width = tile_width
+        self.parallax = parallax
+
+    def draw(self, window, offset_x):
+        shift = int(offset_x * self.parallax) % self.tile_width if self.parallax else 0
+        window.blit(self.strip, (-shift, 0))
+
+
+def get_background(name, parallax=None):
+    if parallax is None:
+        parallax = BACKGROUND_PARALLAX
     # Uses robust path finding for the background image
-    image = pygame.image.load(get_base_path(join("assets", "Background", name))).convert()
+    path = join("assets", "Background", name)
+    image = load_image(path, alpha=False)
     _, _, width, height = image.get_rect()
-    tiles = []
 
-    for i in range(WIDTH // width + 1):
-        for j in range(HEIGHT // height + 1):
-            pos = (i * width, j * height)
-            tiles.append(pos)
+    def composite():
+        strip = pygame.Surface((WIDTH + width, HEIGHT)).convert()
+        for i in range(WIDTH // width + 2):
+            for j in range(HEIGHT // height + 1):
+                strip.blit(image, (i * width, j * height))
+        return strip
+
+    strip = ASSET_CACHE.get(("background", get_base_path(path), (WIDTH, HEIGHT), 1, False), composite)
+    return BackgroundLayer(strip, width, parallax)
+
+class TerrainChunks:
+    """
+    Static terrain baked into fixed-width chunk surfaces, so drawing terrain
+    costs one blit per chunk on screen (one or two) however long the level is.
+    Chunks are baked the first time they come into view and kept in a small
+    LRU; a chunk is only rebaked after a block inside it is added, removed
+    or marked dirty.
+    """
+
+    def __init__(self, blocks, chunk_width=WIDTH, max_resident=8):
+        self.chunk_width = chunk_width
+        self.max_resident = max_resident
+        self.blocks_by_chunk = {} # chunk index -> blocks overlapping it
+        self.surfaces = OrderedDict() # chunk index -> baked surface
+        self.version = 0 # Bumped whenever baked terrain may look different
+        blocks = list(blocks)
+        self.top = min((block.rect.top for block in blocks), default=0)
+        self.height = max((block.rect.bottom for block in blocks), default=0) - self.top
+        for block in blocks:
+            self.add(block)
+
+    def _chunk_range(self, rect):
+        return range(rect.left // self.chunk_width, (rect.right - 1) // self.chunk_width + 1)
+
+    def add(self, block):
+        self.version += 1
+        if block.rect.top < self.top or block.rect.bottom > self.top + self.height:
+            # Grow the baked band vertically; every chunk has to be rebaked
+            bottom = max(self.top + self.height, block.rect.bottom)
+            self.top = min(self.top, block.rect.top)
+            self.height = bottom - self.top
+            self.surfaces.clear()
+        for index in self._chunk_range(block.rect):
+            self.blocks_by_chunk.setdefault(index, []).append(block)
+            self.surfaces.pop(index, None)
+
+    def remove(self, block):
+        self.version += 1
+        for index in self._chunk_range(block.rect):
+            chunk = self.blocks_by_chunk.get(index)
+            if chunk and block in chunk:
+                chunk.remove(block)
+            self.surfaces.pop(index, None)
+
+    def mark_dirty(self, block):
+        """Call after changing a block's image so the chunks holding it are rebaked."""
+        self.version += 1
+        for index in self._chunk_range(block.rect):
+            self.surfaces.pop(index, None)
+
+    def _bake(self, index):
+        surface = pygame.Surface((self.chunk_width, self.height), pygame.SRCALPHA, 32)
+        chunk_x = index * self.chunk_width
+        for block in self.blocks_by_chunk[index]:
+            surface.blit(block.image, (block.rect.x - chunk_x, block.rect.y - self.top))
+        return surface
+
+    def draw(self, window, offset_x):
+        first = offset_x // self.chunk_width
+        last = (offset_x + window.get_width() - 1) // self.chunk_width
+        for index in range(first, last + 1):
+            if not self.blocks_by_chunk.get(index):
+                continue
+            surface = self.surfaces.get(index)
+            if surface is None:
+                surface = self.surfaces[index] = self._bake(index)
+                if len(self.surfaces) > self.max_resident:
+                    self.surfaces.popitem(last=False)
+            else:
+                self.surfaces.move_to_end(index)
+            window.blit(surface, (index * self.chunk_width - offset_x, self.top))
+
+
+class CullingIndex:
+    """
+    Keeps static objects sorted by rect.x so the objects overlapping the
+    camera can be found by bisection instead of visiting the whole level.
+    Objects with MOVES set are kept in a small side list and tested directly.
+
+    Removing only marks an object as gone (a tombstone that visible() skips);
+    the sorted lists are compacted once tombstones make up half of them, so
+    evicting a streamed segment doesn't shift the lists once per object.
+    """
+    MIN_COMPACT = 64 # Tombstones tolerated regardless of size before compacting
+
+    def __init__(self, objects):
+        self.keys = []
+        self.items = []
+        self.removed = set() # Tombstones: objects still in items but no longer indexed
+        self.moving = []
+        self.max_width = 0
+        self.culled = 0
+        for obj in objects:
+            self.add(obj)
+
+    def _slot(self, obj):
+        """Index of obj in items, or None."""
+        i = bisect.bisect_left(self.keys, obj.rect.x)
+        while i < len(self.items) and self.keys[i] == obj.rect.x:
+            if self.items[i] is obj:
+                return i
+            i += 1
+        return None
+
+    def _compact(self):
+        removed = self.removed
+        kept = [i for i, obj in enumerate(self.items) if obj not in removed]
+        self.keys = [self.keys[i] for i in kept]
+        self.items = [self.items[i] for i in kept]
+        removed.clear()
+
+    def add(self, obj):
+        if obj.MOVES:
+            self.moving.append(obj)
+            return
+        if obj in self.removed:
+            if self._slot(obj) is not None:
+                self.removed.discard(obj) # Still filed where it was; just revive it
+                return
+            self._compact()
+        # bisect_right keeps insertion order among equal x, so draw order stays stable
+        i = bisect.bisect_right(self.keys, obj.rect.x)
+        self.keys.insert(i, obj.rect.x)
+        self.items.insert(i, obj)
+        self.max_width = max(self.max_width, obj.rect.width)
+
+    def remove(self, obj):
+        if obj.MOVES:
+            if obj in self.moving:
+                self.moving.remove(obj)
+            return
+        if obj in self.removed or self._slot(obj) is None:
+            return
+        self.removed.add(obj)
+        if len(self.removed) > max(self.MIN_COMPACT, len(self.items) // 2):
+            self._compact()
+
+    def visible(self, left, right):
+        """Returns the objects whose rect overlaps the x range [left, right)."""
+        start = bisect.bisect_left(self.keys, left - self.max_width)
+        end = bisect.bisect_left(self.keys, right)
+        removed = self.removed
+        if removed:
+            visible = [obj for obj in self.items[start:end] if obj.rect.right > left and obj not in removed]
+        else:
+            visible = [obj for obj in self.items[start:end] if obj.rect.right > left]
+        visible.extend(obj for obj in self.moving if obj.rect.right > left and obj.rect.left < right)
+        self.culled = len(self.items) - len(removed) + len(self.moving) - len(visible)
+        return visible
+
+
+class BitmapFont:
+    """
+    Renders text from an 8x10 glyph sheet (assets/Menu/Text). The sheet is
+    sliced once into a glyph table; each string is built with one batched
+    blit, tinted, scaled, and kept in an LRU cache so repeated HUD text
+    costs a single cached blit per frame.
+    """
+    GLYPH_WIDTH = 8
+    GLYPH_HEIGHT = 10
+    # Sheet layout, row by row (the font is uppercase only)
+    GLYPH_ROWS = ["ABCDEFGHIJ", "KLMNOPQRST", "UVWXYZ", "0123456789", ".,:?!()+-"]
+    # The sheet has no slash, so it is drawn as a 2px diagonal in the same style
+    SLASH_PIXELS = [(6, 1), (6, 2), (5, 3), (5, 4), (4, 5), (3, 6), (2, 7), (2, 8)]
+    PIXELS_PER_SCALE = 12 # Requested size per integer scale step, close to the old SysFont height
+
+    def __init__(self, relative_path, cache_size=128):
+        self.relative_path = relative_path
+        self.cache_size = cache_size
+        self.glyphs = None
+        self.rendered = OrderedDict() # (text, scale, color) -> surface
+
+    def _load_glyphs(self):
+        sheet = load_image(self.relative_path)
+        glyphs = {}
+        for row, chars in enumerate(self.GLYPH_ROWS):
+            for col, char in enumerate(chars):
+                rect = (col * self.GLYPH_WIDTH, row * self.GLYPH_HEIGHT, self.GLYPH_WIDTH, self.GLYPH_HEIGHT)
+                glyphs[char] = sheet.subsurface(rect)
+
+        slash = pygame.Surface((self.GLYPH_WIDTH, self.GLYPH_HEIGHT), pygame.SRCALPHA, 32)
+        for x, y in self.SLASH_PIXELS:
+            slash.fill((255, 255, 255), (x, y, 2, 1))
+        glyphs["/"] = slash
+        self.glyphs = glyphs
+
+    def scale_for(self, size):
+        return max(1, round(size / self.PIXELS_PER_SCALE))
+
+    def render(self, text, size, color=(255, 255, 255)):
+        key = (text, self.scale_for(size), tuple(color))
+        surface = self.rendered.get(key)
+        if surface is not None:
+            self.rendered.move_to_end(key)
+            return surface
+
+        if self.glyphs is None:
+            self._load_glyphs()
+
+        text = text.upper()
+        surface = pygame.Surface((len(text) * self.GLYPH_WIDTH, self.GLYPH_HEIGHT), pygame.SRCALPHA, 32)
+        # Unknown characters (including spaces) just advance the cursor
+        surface.blits([(self.glyphs[char], (i * self.GLYPH_WIDTH, 0)) for i, char in enumerate(text) if char in self.glyphs],
+                      doreturn=False)
+        surface.fill(tuple(color) + (255,), special_flags=pygame.BLEND_RGBA_MULT)
+
+        scale = key[1]
+        if scale != 1:
+            surface = pygame.transform.scale(surface, (surface.get_width() * scale, surface.get_height() * scale))
+
+        self.rendered[key] = surface
+        if len(self.rendered) > self.cache_size:
+            self.rendered.popitem(last=False)
+        return surface
+
+
+FONT = BitmapFont(join("assets", "Menu", "Text", "Text (White) (8x10).png"))
 
-    return tiles, image
 
 def draw_text(window, text, size, x, y, color=(255, 255, 255)):
-    font = pygame.font.SysFont("comicsans", size, bold=True)
-    text_surface = font.render(text, 1, color)
+    text_surface = FONT.render(text, size, color)
     text_rect = text_surface.get_rect(center=(x, y))
     window.blit(text_surface, text_rect)
 
-def draw_boss_health(window, boss, offset_x):
+
+class HudLayer:
+    """
+    The health/score readout and the boss health bar as cached surfaces.
+    Each is rebuilt only when the values it shows change (player.health,
+    player.score, boss.health), so a steady HUD costs one blit per element.
+    """
+
+    def __init__(self):
+        self.stats_key = None
+        self.stats = None # (surface, screen rect)
+        self.boss_key = None
+        self.boss_bar = None # (surface, rect relative to the boss's top-left)
+
+    def stats_footprint(self, player):
+        """The "Score" and "Health" texts as one surface: (surface, screen rect)."""
+        key = (player.health, player.max_health, player.score)
+        if key != self.stats_key:
+            health = FONT.render(f"Health: {player.health}/{player.max_health}", 30)
+            score = FONT.render(f"Score: {player.score}", 30)
+            health_rect = health.get_rect(center=(WIDTH - 150, 30))
+            score_rect = score.get_rect(center=(WIDTH - 350, 30))
+            rect = health_rect.union(score_rect)
+            surface = pygame.Surface(rect.size, pygame.SRCALPHA, 32)
+            surface.blit(health, health_rect.move(-rect.x, -rect.y))
+            surface.blit(score, score_rect.move(-rect.x, -rect.y))
+            self.stats_key, self.stats = key, (surface, rect)
+        return self.stats
+
+    def boss_footprint(self, boss, offset_x, offset_y=0):
+        """The boss bar and name above the boss: (surface, screen rect), or None once it is beaten."""
+        if not boss.is_visible or boss.health <= 0:
+            return None
+        bar_width = boss.width
+        bar_height = 10
+        key = (boss.health, boss.max_health, bar_width)
+        if key != self.boss_key:
+            name = FONT.render("Rock Head", 20)
+            # Relative to the bar's top-left, which sits 10px above the boss
+            bar_rect = pygame.Rect(0, 0, bar_width, bar_height)
+            name_rect = name.get_rect(center=(bar_width / 2, -15))
+            rect = bar_rect.union(name_rect)
+            surface = pygame.Surface(rect.size, pygame.SRCALPHA, 32)
+            # Background bar (red/dark), then the foreground bar (green)
+            pygame.draw.rect(surface, (50, 50, 50), bar_rect.move(-rect.x, -rect.y), 0, 3)
+            health_ratio = boss.health / boss.max_health
+            pygame.draw.rect(surface, (0, 255, 0), (-rect.x, -rect.y, bar_width * health_ratio, bar_height), 0, 3)
+            surface.blit(name, name_rect.move(-rect.x, -rect.y))
+            self.boss_key, self.boss_bar = key, (surface, rect)
+        surface, rect = self.boss_bar
+        return surface, rect.move(boss.rect.x - offset_x, boss.rect.y - offset_y - bar_height - 10)
+
+
+HUD = HudLayer()
+
+
+def draw_boss_health(window, boss, offset_x, offset_y=0):
     """Draws the boss health bar and name above the boss."""
     # Only draw if the boss is visible and has health
-    if not boss.is_visible or boss.health <= 0: 
-        return
-        
-    bar_width = boss.width 
-    bar_height = 10
-    
-    # Calculate screen coordinates
-    x = boss.rect.x - offset_x
-    y = boss.rect.y - bar_height - 10
-    
-    # Background bar (red/dark)
-    pygame.draw.rect(window, (50, 50, 50), (x, y, bar_width, bar_height), 0, 3)
-    
-    # Foreground bar (green)
-    health_ratio = boss.health / boss.max_health
-    current_health_width = bar_width * health_ratio
-    
-    pygame.draw.rect(window, (0, 255, 0), (x, y, current_health_width, bar_height), 0, 3)
-    
-    draw_text(window, "Rock Head", 20, x + bar_width / 2, y - 15, (255, 255, 255))
-
+    footprint = HUD.boss_footprint(boss, offset_x, offset_y)
+    if footprint is not None:
+        window.blit(*footprint)
 
-def draw(window, background, bg_image, player, objects, offset_x):
-    for tile in background:
-        window.blit(bg_image, tile)
 
-    for obj in objects:
-        obj.draw(window, offset_x)
+class DirtyRectPresenter:
+    """
+    Pushes only the changed parts of a frame to the display while the camera
+    holds still. Every frame is described by footprints: what each sprite
+    and HUD element puts on screen, as (surface, screen rect) in draw order.
+    When the camera offset and baked terrain match the previous frame, only
+    the footprints that changed, appeared or vanished are redrawn (under a
+    clip) and passed to pygame.display.update(rects). A scroll, a terrain
+    change or a dirty area above FULL_FRACTION of the window falls back to
+    drawing and flipping the whole frame.
+    """
+    FULL_FRACTION = 0.5
+
+    def __init__(self, size=(WIDTH, HEIGHT)):
+        self.screen = pygame.Rect((0, 0), size)
+        self.offset_x = None
+        self.terrain_version = None
+        self.footprints = {}
+
+    def dirty_rects(self, offset_x, terrain_version, footprints):
+        """Returns the merged screen rects to redraw, or None if the whole frame must be."""
+        previous, self.footprints = self.footprints, footprints
+        if (offset_x, terrain_version) != (self.offset_x, self.terrain_version):
+            self.offset_x, self.terrain_version = offset_x, terrain_version
+            return None
+
+        rects = []
+        for key in previous.keys() | footprints.keys():
+            old, new = previous.get(key), footprints.get(key)
+            # Surfaces compare by identity, rects by value
+            if old != new:
+                rects.extend(footprint[1] for footprint in (old, new) if footprint is not None)
+
+        merged = []
+        for rect in rects:
+            rect = rect.clip(self.screen)
+            if not rect.width or not rect.height:
+                continue
+            i = rect.collidelist(merged)
+            while i != -1: # Absorb everything the growing rect now overlaps
+                rect.union_ip(merged.pop(i))
+                i = rect.collidelist(merged)
+            merged.append(rect)
+
+        if sum(rect.width * rect.height for rect in merged) > self.FULL_FRACTION * self.screen.width * self.screen.height:
+            return None
+        return merged
+
+
+def frame_footprints(player, world, visible, offset_x, alpha):
+    """The footprints (see DirtyRectPresenter) of one frame, keyed by what drew them."""
+    footprints = {}
+    for obj in visible:
+        footprint = obj.footprint(*world.draw_offset(obj, offset_x, alpha)) if obj.MOVES else obj.footprint(offset_x)
+        if footprint is not None:
+            footprints[obj] = footprint
+    footprint = player.footprint(offset_x, alpha)
+    if footprint is not None:
+        footprints[player] = footprint
+    footprints["stats"] = HUD.stats_footprint(player)
+    if world.boss:
+        footprint = HUD.boss_footprint(world.boss, *world.draw_offset(world.boss, offset_x, alpha))
+        if footprint is not None:
+            footprints["boss_bar"] = footprint
+    if PROFILER.overlay:
+        footprints["profiler"] = PROFILER.overlay_footprint()
+    return footprints
+
+
+def draw(window, background, player, world, offset_x, alpha=1.0, presenter=None):
+    """
+    Draws one frame and returns how many objects were culled off-screen.
+    alpha is how far rendering is between the last two simulation steps.
+    With a DirtyRectPresenter, a frame from a still camera only redraws and
+    presents the regions that changed.
+    """
+    visible = world.index.visible(offset_x, offset_x + WIDTH)
+    if presenter is not None:
+        footprints = frame_footprints(player, world, visible, offset_x, alpha)
+        rects = presenter.dirty_rects(offset_x, world.terrain.version, footprints)
+        if rects is not None:
+            for rect in rects:
+                window.set_clip(rect)
+                background.draw(window, offset_x)
+                world.terrain.draw(window, offset_x)
+                window.blits([footprint for footprint in footprints.values() if footprint[1].colliderect(rect)],
+                             doreturn=False)
+            window.set_clip(None)
+            if PROFILER.enabled:
+                PROFILER.mark("draw")
+            if rects:
+                pygame.display.update(rects)
+            if PROFILER.enabled:
+                PROFILER.mark("present")
+            return world.index.culled
+
+    background.draw(window, offset_x)
+
+    # Blocks are drawn from the baked terrain chunks
+    world.terrain.draw(window, offset_x)
+
+    for obj in visible:
+        if obj.MOVES:
+            obj.draw(window, *world.draw_offset(obj, offset_x, alpha)) # Between its last two steps, like the player
+        else:
+            obj.draw(window, offset_x)
 
-    player.draw(window, offset_x)
+    player.draw(window, offset_x, alpha)
 
-    # Draw UI (Health and Score)
-    draw_text(window, f"Health: {player.health}/{player.max_health}", 30, WIDTH - 150, 30)
-    draw_text(window, f"Score: {player.score}", 30, WIDTH - 350, 30)
+    # Draw UI (Health and Score), cached until the values change
+    window.blit(*HUD.stats_footprint(player))
 
     # Check and draw boss health if available
-    boss = next((obj for obj in objects if obj.name == "rockhead_boss"), None)
+    boss = world.boss
     if boss:
-        draw_boss_health(window, boss, offset_x)
+        draw_boss_health(window, boss, *world.draw_offset(boss, offset_x, alpha))
 
+    if PROFILER.overlay:
+        window.blit(*PROFILER.overlay_footprint())
 
+    if PROFILER.enabled:
+        PROFILER.mark("draw")
     pygame.display.update()
+    if PROFILER.enabled:
+        PROFILER.mark("present")
+    return world.index.culled
+
+class MenuFrame:
+    """
+    A menu screen composed once into a cached frame (background, icons and
+    labels), plus the buttons that get a highlight while hovered. present()
+    only blits and flips when the hovered button changed or the window was
+    exposed, and wait() blocks in pygame.event.wait, so an idle menu sleeps
+    instead of redrawing at 60 FPS. The timeout lets the menu adopt
+    finished prefetches a few times a second.
+    """
+    IDLE_TIMEOUT = 250 # Most milliseconds wait() blocks without an event
+    REDRAW_EVENTS = (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED, pygame.WINDOWSIZECHANGED)
+
+    def __init__(self, frame, buttons=()):
+        self.frame = frame
+        self.buttons = list(buttons)
+        self.hovered = None
+        self.stale = True
+
+    def button_at(self, pos):
+        for button in self.buttons:
+            if button["rect"].collidepoint(pos):
+                return button
+        return None
+
+    def present(self, window):
+        """Redraws the screen if anything visible changed; returns True if it did."""
+        hovered = self.button_at(pygame.mouse.get_pos())
+        if not self.stale and hovered is self.hovered:
+            return False
+        self.hovered = hovered
+        self.stale = False
+        window.blit(self.frame, (0, 0))
+        if hovered is not None:
+            pygame.draw.rect(window, (255, 255, 255), hovered["rect"], 3, 5)
+        pygame.display.update()
+        return True
+
+    def wait(self):
+        """Blocks until input arrives (or IDLE_TIMEOUT passes) and returns every pending event."""
+        events = [pygame.event.wait(self.IDLE_TIMEOUT)]
+        events.extend(pygame.event.get())
+        for event in events:
+            if event.type in self.REDRAW_EVENTS:
+                self.stale = True
+        return events
+
+
+def compose_menu(bg_color):
+    """A window-sized opaque surface filled with bg_color, to compose a MenuFrame on."""
+    frame = pygame.Surface((WIDTH, HEIGHT)).convert()
+    frame.fill(bg_color)
+    return frame
+
 
 def display_start_screen(window):
     """
@@ -950,26 +2916,34 @@ def display_start_screen(window):
     play_img = load_image(join("assets", "Menu", "Buttons", "Play.png"), scale_factor=3.5) 
     play_img_rect = play_img.get_rect(center=(WIDTH // 2, HEIGHT // 2))
 
-    clock = pygame.time.Clock()
+    frame = compose_menu(BG_COLOR)
     
-    waiting = True
-    while waiting:
-        clock.tick(FPS)
-        
-        window.fill(BG_COLOR)
-        
-        # Draw the Play.png image
-        window.blit(play_img, play_img_rect.topleft)
-        
-        # Draw Title Text
-        draw_text(window, "UGA-BUGA PLATFORMER", 60, WIDTH // 2, 50, (255, 165, 0))
-        
-        # Draw prompt over the image
-        draw_text(window, "Press ENTER to Select Level", 40, WIDTH // 2, HEIGHT - 100, (255, 255, 255))
-        
-        pygame.display.update()
+    # Draw the Play.png image
+    frame.blit(play_img, play_img_rect.topleft)
+    
+    # Draw Title Text
+    draw_text(frame, "UGA-BUGA PLATFORMER", 60, WIDTH // 2, 50, (255, 165, 0))
+    
+    # Draw prompt over the image
+    draw_text(frame, "Press ENTER to Select Level", 40, WIDTH // 2, HEIGHT - 100, (255, 255, 255))
 
-        for event in pygame.event.get():
+    menu = MenuFrame(frame)
+    STARTUP.mark("title assets")
+    
+    while True:
+        PREFETCH.adopt()
+        menu.present(window)
+
+        if STARTUP.enabled:
+            # --startup-report measures time to the first presented title frame, then exits
+            STARTUP.mark("first title frame")
+            STARTUP.report()
+            return "quit"
+
+        # The first level is the likely pick; decode it while the title is shown (a no-op after the first frame)
+        PREFETCH.request(LEVEL_IDS[0])
+
+        for event in menu.wait():
             if event.type == pygame.QUIT:
                 return "quit"
             if event.type == pygame.KEYDOWN:
@@ -977,7 +2951,6 @@ def display_start_screen(window):
                     return "level_select" # Transition to level select
                 if event.key == pygame.K_ESCAPE:
                     return "quit"
-    return "quit"
 
 
 def display_level_select(window):
@@ -987,8 +2960,6 @@ def display_level_select(window):
     """
     BG_COLOR = (25, 50, 60) # Dark Blue/Green Background
     
-    clock = pygame.time.Clock()
-    
     # Increased scale_factor to 2.5 for larger icons
     LEVEL_ICON_SCALE = 2.5 
 
@@ -1009,36 +2980,33 @@ def display_level_select(window):
         {"id": "level_02", "img": level_icons["level_02"], "rect": level_icons["level_02"].get_rect(center=(WIDTH // 2 + ICON_SPACING, CENTER_Y))},
     ]
 
-    waiting = True
-    while waiting:
-        clock.tick(FPS)
-        
-        window.fill(BG_COLOR)
-        
-        # Draw Title
-        draw_text(window, "SELECT LEVEL", 70, WIDTH // 2, 150, (255, 255, 255))
+    frame = compose_menu(BG_COLOR)
+    
+    # Draw Title
+    draw_text(frame, "SELECT LEVEL", 70, WIDTH // 2, 150, (255, 255, 255))
+
+    for button in LEVEL_BUTTONS:
+        # Draw the level icon (01.png or 02.png)
+        icon = button["img"]
+        frame.blit(icon, button["rect"].topleft)
+        
+        # Draw level number label
+        label = button["id"].split("_")[1]
+        if label == "02":
+             draw_text(frame, f"BOSS ARENA", 30, button["rect"].centerx, button["rect"].bottom + 20, (255, 100, 100))
+        else:
+             draw_text(frame, f"Level {label}", 30, button["rect"].centerx, button["rect"].bottom + 20, (255, 255, 255))
 
-        
-        for button in LEVEL_BUTTONS:
-            # Draw the level icon (01.png or 02.png)
-            icon = button["img"]
-            window.blit(icon, button["rect"].topleft)
-            
-            # Draw level number label
-            label = button["id"].split("_")[1]
-            if label == "02":
-                 draw_text(window, f"BOSS ARENA", 30, button["rect"].centerx, button["rect"].bottom + 20, (255, 100, 100))
-            else:
-                 draw_text(window, f"Level {label}", 30, button["rect"].centerx, button["rect"].bottom + 20, (255, 255, 255))
-            
-            # Highlight on hover
-            if button["rect"].collidepoint(pygame.mouse.get_pos()):
-                pygame.draw.rect(window, (255, 255, 255), button["rect"], 3, 5)
+    menu = MenuFrame(frame, LEVEL_BUTTONS)
 
+    while True:
+        PREFETCH.adopt()
 
-        pygame.display.update()
+        # Highlight on hover, and start decoding that level's assets
+        if menu.present(window) and menu.hovered is not None:
+            PREFETCH.request(menu.hovered["id"])
 
-        for event in pygame.event.get():
+        for event in menu.wait():
             if event.type == pygame.QUIT:
                 return "quit"
             if event.type == pygame.KEYDOWN:
@@ -1047,51 +3015,293 @@ def display_level_select(window):
             
             if event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1: # Left click
-                    for button in LEVEL_BUTTONS:
-                        if button["rect"].collidepoint(event.pos):
-                            return button["id"]
+                    button = menu.button_at(event.pos)
+                    if button is not None:
+                        return button["id"]
+
+
+class InputState:
+    """Player input for one simulation step: held left/right and a jump press (or a count of them)."""
+    __slots__ = ("left", "right", "jump")
+
+    def __init__(self, left=False, right=False, jump=False):
+        self.left = left
+        self.right = right
+        self.jump = jump
+
+    @classmethod
+    def from_keyboard(cls):
+        keys = pygame.key.get_pressed()
+        return cls(keys[pygame.K_LEFT], keys[pygame.K_RIGHT])
+
+
+# A recording is a header, (input code, repeat count) runs, and the state the run
+# ended in. An input code packs left (1), right (2) and the jump presses (<< 2).
+RECORDING_MAGIC = b"UGIR"
+RECORDING_VERSION = 1
+# Header: magic, version, level id, random seed, activity margin, run count
+RECORDING_HEADER = struct.Struct("=4sH16sQiI")
+RECORDING_RUN = struct.Struct("=BH")
+# Footer: outcome, ticks, score, health, player x, player y
+RECORDING_FOOTER = struct.Struct("=8sIiiii")
+RECORDING_RESULT = ("outcome", "ticks", "score", "health", "x", "y")
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_JUMP_SHIFT = 2
+
+
+class InputRecording:
+    """
+    The per-step inputs of one level run, run-length encoded, with what is
+    needed to replay it exactly: the level, the seed of the global random
+    generator (the boss blinks from it) and the activity margin (a sleeping
+    boss does not draw from it). result holds the simulate() report fields
+    of RECORDING_RESULT the run ended with, for replay() to check.
+    """
+
+    def __init__(self, level_id, seed, activity_margin):
+        self.level_id = level_id
+        self.seed = seed
+        self.activity_margin = activity_margin
+        self.runs = [] # [input code, steps]
+        self.result = None
+
+    def __len__(self):
+        return sum(count for _, count in self.runs)
+
+    def record(self, inputs, jumps=0):
+        """Appends one step: the held keys of inputs and the number of jump presses."""
+        code = (INPUT_LEFT if inputs.left else 0) | (INPUT_RIGHT if inputs.right else 0) | min(jumps, 63) << INPUT_JUMP_SHIFT
+        if self.runs and self.runs[-1][0] == code and self.runs[-1][1] < 0xFFFF:
+            self.runs[-1][1] += 1
+        else:
+            self.runs.append([code, 1])
+
+    def finish(self, outcome, player):
+        """Stores the final state; outcome uses simulate()'s names ("win", "lose" or "timeout")."""
+        self.result = {"outcome": outcome, "ticks": len(self), "score": player.score, "health": player.health,
+                       "x": player.rect.x, "y": player.rect.y}
+
+    def inputs(self):
+        """The recorded steps as InputStates; jump holds the number of presses."""
+        for code, count in self.runs:
+            state = InputState(bool(code & INPUT_LEFT), bool(code & INPUT_RIGHT), code >> INPUT_JUMP_SHIFT)
+            for _ in range(count):
+                yield state
+
+    def save(self, path):
+        result = self.result
+        with open(path, "wb") as f:
+            f.write(RECORDING_HEADER.pack(RECORDING_MAGIC, RECORDING_VERSION, self.level_id.encode(), self.seed,
+                                          self.activity_margin, len(self.runs)))
+            for code, count in self.runs:
+                f.write(RECORDING_RUN.pack(code, count))
+            f.write(RECORDING_FOOTER.pack(result["outcome"].encode(), *(result[key] for key in RECORDING_RESULT[1:])))
+
+    @classmethod
+    def load(cls, path):
+        """Reads a recording written by save(). Raises ValueError if it is not one or is truncated."""
+        with open(path, "rb") as f:
+            data = f.read()
+        try:
+            magic, version, level_id, seed, margin, run_count = RECORDING_HEADER.unpack_from(data)
+            if magic != RECORDING_MAGIC or version != RECORDING_VERSION:
+                raise ValueError(f"{path} is not a version {RECORDING_VERSION} input recording")
+            recording = cls(level_id.rstrip(b"\0").decode(), seed, margin)
+            offset = RECORDING_HEADER.size
+            for _ in range(run_count):
+                recording.runs.append(list(RECORDING_RUN.unpack_from(data, offset)))
+                offset += RECORDING_RUN.size
+            outcome, *values = RECORDING_FOOTER.unpack_from(data, offset)
+        except struct.error as e:
+            raise ValueError(f"{path} is truncated: {e}") from None
+        recording.result = dict(zip(RECORDING_RESULT, [outcome.rstrip(b"\0").decode()] + values))
+        return recording
+
+
+def recording_path(base, level_id):
+    """The first free "<base>-<level_id>-<n><ext>" path, so every recorded run gets its own file."""
+    root, ext = os.path.splitext(base)
+    run = 1
+    while os.path.exists(f"{root}-{level_id}-{run}{ext}"):
+        run += 1
+    return f"{root}-{level_id}-{run}{ext}"
+
+
+def scripted_inputs(pattern, seed=0):
+    """
+    Endless per-step input source for headless runs.
+    "idle" stands still, "right" runs right jumping every 40 steps, and
+    "random" holds a seeded random direction for 30 to 90 steps at a time.
+    """
+    if pattern == "idle":
+        while True:
+            yield InputState()
+    elif pattern == "right":
+        tick = 0
+        while True:
+            yield InputState(right=True, jump=tick % 40 == 0)
+            tick += 1
+    elif pattern == "random":
+        rng = random.Random(seed)
+        while True:
+            left, right = rng.choice(((False, False), (True, False), (False, True)))
+            for _ in range(rng.randint(30, 90)):
+                yield InputState(left, right, rng.random() < 0.03)
+    else:
+        raise ValueError(f"Unknown input pattern: {pattern}")
+
+
+def camera_offset(center_x, level_width):
+    """Centers the camera on center_x, clamped to the edges of the level."""
+    # 1. Calculate the ideal offset to perfectly center the player
+    target_offset_x = center_x - WIDTH // 2
+    
+    # 2. Clamp the offset against the left edge of the world (0)
+    clamped_offset_x = max(0, target_offset_x)
+    
+    # 3. Clamp the offset against the right edge of the world
+    max_offset_x = max(0, level_width - WIDTH)
+    
+    # Set the final offset, ensuring it doesn't exceed the right boundary
+    return min(max_offset_x, clamped_offset_x)
 
-    return "quit" # Should not be reached
+
+def step_level(player, world, level_id, jumps=0, inputs=None):
+    """
+    Advances the level by one fixed simulation step.
+    jumps is the number of jump presses since the last step and inputs the
+    held movement keys (an InputState, or None to read the keyboard).
+    Returns "running", "win" or "lose".
+    """
+    for _ in range(jumps):
+        if player.jump_count < 2:
+            player.jump()
+
+    # The clamped camera draw() will use, so entities on screen near the level edges stay awake
+    if world.level_width is None:
+        world.level_width = level_width_for(world, level_id)
+    camera_x = camera_offset(player.rect.centerx, world.level_width)
+    if world.stream is not None:
+        world.stream.stream_to(camera_x)
+    profiling = PROFILER.enabled
+    if profiling:
+        PROFILER.mark("stream")
+
+    player.save_position()
+    player.loop(FPS)
+    if profiling:
+        PROFILER.mark("player.loop")
+    
+    # Animate the entities near the camera (Fire, Checkpoints, Boss); the rest sleep
+    world.update(camera_x)
+    if profiling:
+        PROFILER.mark("objects")
+            
+    # --- Fall-to-Death Check ---
+    # If the player falls 100 pixels below the screen, they lose instantly.
+    if player.rect.y > HEIGHT + 100:
+        player.health = 0
+        
+    # Check for death and transition to lose screen if health is 0
+    if player.health <= 0:
+        return "lose"
+        
+    # Handle movement and collisions
+    move_result = handle_move(player, world, inputs)
+    
+    # BOSS LEVEL WIN CONDITION
+    if level_id == "level_02":
+        boss = world.boss
+        end_checkpoint = world.endpoint
+        
+        # Win if the boss is defeated!
+        if boss and boss.health <= 0 and end_checkpoint: 
+            
+            # 1. Make boss invisible and stop its logic
+            if boss.is_visible:
+                boss.is_visible = False
+                boss_center_x = boss.rect.centerx
+                boss_bottom_y = boss.rect.bottom
+                
+                # 2. Move the goal to where the boss was, slightly above the floor
+                end_checkpoint.rect.x = boss_center_x - end_checkpoint.width // 2
+                end_checkpoint.rect.y = boss_bottom_y - end_checkpoint.height - 20 # 20px buffer
+                end_checkpoint.activate()
+                world.moved(end_checkpoint)
+            
+            # Check for collision with the now-active, visible endpoint
+            if pygame.sprite.collide_mask(player, end_checkpoint):
+                return "win"
+
+    # STANDARD LEVEL WIN CONDITION
+    elif move_result == "win":
+        return "win"
+
+    return "running"
+
+
+def level_width_for(world, level_id):
+    """Total scrollable width of a level, based on the rightmost terrain or endpoint."""
+    if world.stream is not None:
+        max_world_x = world.stream.right
+    else:
+        level_objects = list(world.solids)
+        if world.endpoint:
+            level_objects.append(world.endpoint)
+        max_world_x = max((obj.rect.right for obj in level_objects), default=WIDTH)
+    # If it's a boss level (fixed arena), ensure the level width is just the screen width
+    if level_id == "level_02":
+        return max_world_x + BLOCK_SIZE # Ensure we can scroll slightly past the arena end
+    # Give a little buffer space after the end checkpoint
+    return max(WIDTH, max_world_x + BLOCK_SIZE)
 
 
 def run_level(window, level_id):
     """
     Main game loop, now dedicated to running a specific level.
+    Physics runs in fixed SIM_DT steps from a time accumulator; rendering
+    is capped separately by RENDER_FPS and interpolates the player, the
+    camera and moving entities (see World.draw_offset) between the last
+    two steps. When a frame falls behind, up to MAX_CATCHUP_STEPS steps
+    run before the next render, so under load rendered frames are dropped
+    rather than simulation steps. With
+    DIRTY_RECTS, frames from a still camera only present what changed.
+    F3 toggles the frame profiler overlay (and turns profiling on). With
+    RECORD_PATH, the run's inputs are written to a numbered file next to it
+    when it ends (see recording_path).
     """
     
     clock = pygame.time.Clock()
-    background, bg_image = get_background("Blue.png")
+    PREFETCH.adopt() # Take whatever the menus finished decoding
+    background = get_background("Blue.png")
 
     # --- Level Constants ---
     block_size = BLOCK_SIZE 
     floor_y = HEIGHT - block_size
     
+    recording = None
+    if RECORD_PATH:
+        # Seed the generator the boss blinks from, so a replay draws the same numbers
+        recording = InputRecording(level_id, random.randrange(2 ** 32), ACTIVITY_MARGIN)
+        random.seed(recording.seed)
+
     # --- LEVEL INITIALIZATION ---
-    player, objects, start_x, start_y = create_level_objects(level_id, block_size, floor_y)
-    
-    # Calculate the total width of the level based on the rightmost object 
-    max_world_x = max((obj.rect.right for obj in objects if obj.name in ["block", "endpoint"]), default=WIDTH)
-    # If it's a boss level (fixed arena), ensure the level width is just the screen width
-    if level_id == "level_02":
-        level_width = max_world_x + block_size # Ensure we can scroll slightly past the arena end
-    else:
-        # Give a little buffer space after the end checkpoint
-        level_width = max(WIDTH, max_world_x + block_size) 
-    
-    # Set initial camera offset to center the player
-    offset_x = player.rect.centerx - WIDTH // 2
-    
-    # Apply initial clamping for the start of the level
-    if offset_x < 0:
-        offset_x = 0
-    elif offset_x > level_width - WIDTH:
-        offset_x = level_width - WIDTH
+    player, world, start_x, start_y = create_level_objects(level_id, block_size, floor_y)
+    level_width = world.level_width = level_width_for(world, level_id)
+    presenter = DirtyRectPresenter(window.get_size()) if DIRTY_RECTS else None
         
     game_state = "running"
+    pending_jumps = 0
+    accumulator = SIM_DT # Guarantees a first step, so the player has a sprite before the first draw
+    previous_time = time.perf_counter()
     
     # Game Loop
     while game_state == "running":
-        clock.tick(FPS)
+        clock.tick(RENDER_FPS)
+        profiling = PROFILER.enabled
+        if profiling:
+            PROFILER.begin()
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -1099,72 +3309,53 @@ def run_level(window, level_id):
                 break
 
             if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE and player.jump_count < 2:
-                    player.jump()
-
-        player.loop(FPS)
-        
-        # Loop over animatable objects (Fire, Checkpoints, Boss)
-        for obj in objects:
-            if hasattr(obj, "loop"):
-                obj.loop()
-                
-        # --- Fall-to-Death Check ---
-        # If the player falls 100 pixels below the screen, they lose instantly.
-        if player.rect.y > HEIGHT + 100:
-            player.health = 0
-            
-        # Check for death and transition to lose screen if health is 0
-        if player.health <= 0:
-            game_state = "lose"
-            continue
-            
-        # Handle movement and collisions
-        move_result = handle_move(player, objects)
-        
-        # BOSS LEVEL WIN CONDITION
-        if level_id == "level_02":
-            boss = next((obj for obj in objects if obj.name == "rockhead_boss"), None)
-            end_checkpoint = next((obj for obj in objects if obj.name == "endpoint"), None)
-            
-            # Win if the boss is defeated!
-            if boss and boss.health <= 0 and end_checkpoint: 
-                
-                # 1. Make boss invisible and stop its logic
-                if boss.is_visible:
-                    boss.is_visible = False
-                    boss_center_x = boss.rect.centerx
-                    boss_bottom_y = boss.rect.bottom
-                    
-                    # 2. Move the goal to where the boss was, slightly above the floor
-                    end_checkpoint.rect.x = boss_center_x - end_checkpoint.width // 2
-                    end_checkpoint.rect.y = boss_bottom_y - end_checkpoint.height - 20 # 20px buffer
-                    end_checkpoint.activate()
-                
-                # Check for collision with the now-active, visible endpoint
-                if pygame.sprite.collide_mask(player, end_checkpoint):
-                    game_state = "win"
-
-        # STANDARD LEVEL WIN CONDITION
-        elif move_result == "win":
-            game_state = "win"
-            
-        # Handle scrolling (camera movement)
-        
-        # 1. Calculate the ideal offset to perfectly center the player
-        target_offset_x = player.rect.centerx - WIDTH // 2
-        
-        # 2. Clamp the offset against the left edge of the world (0)
-        clamped_offset_x = max(0, target_offset_x)
-        
-        # 3. Clamp the offset against the right edge of the world
-        max_offset_x = max(0, level_width - WIDTH)
-        
-        # Set the final offset, ensuring it doesn't exceed the right boundary
-        offset_x = min(max_offset_x, clamped_offset_x)
+                if event.key == pygame.K_SPACE:
+                    pending_jumps += 1
+                elif event.key == pygame.K_F3:
+                    PROFILER.overlay = not PROFILER.overlay
+                    PROFILER.enabled = True
+
+        if game_state != "running":
+            break
+        if profiling:
+            PROFILER.mark("events")
+
+        now = time.perf_counter()
+        accumulator += now - previous_time
+        previous_time = now
+
+        steps = 0
+        while accumulator >= SIM_DT and game_state == "running":
+            if steps == MAX_CATCHUP_STEPS:
+                accumulator = 0.0 # Too far behind: drop the backlog instead of spiralling
+                break
+            inputs = InputState.from_keyboard()
+            if recording is not None:
+                recording.record(inputs, pending_jumps)
+            game_state = step_level(player, world, level_id, pending_jumps, inputs)
+            if profiling:
+                PROFILER.mark("rules")
+            pending_jumps = 0
+            accumulator -= SIM_DT
+            steps += 1
+
+        if game_state == "lose":
+            break
             
-        # Draw everything
-        draw(window, background, bg_image, player, objects, offset_x)
+        # Handle scrolling (camera movement) and draw everything between the last two steps
+        alpha = accumulator / SIM_DT
+        player_x, _ = player.render_position(alpha)
+        offset_x = camera_offset(player_x + player.rect.width // 2, level_width)
+        culled = draw(window, background, player, world, offset_x, alpha, presenter)
+        if profiling:
+            PROFILER.end(culled)
+
+    if recording is not None:
+        # A run cut short replays until its inputs run out, which simulate() reports as a timeout
+        recording.finish(game_state if game_state in ("win", "lose") else "timeout", player)
+        path = recording_path(RECORD_PATH, level_id)
+        recording.save(path)
+        print(f"Recorded {len(recording)} steps of {level_id} to {path}")
 
     # After the main loop, handle game state transitions
     if game_state == "win":
@@ -1180,6 +3371,79 @@ def run_level(window, level_id):
     return result
 
 
+def simulate(player, world, level_id, inputs, max_ticks=FPS * 60):
+    """
+    Steps an already built level as fast as the CPU allows, taking one
+    InputState per step from the inputs iterable. Stops on a win or loss,
+    when inputs run out or after max_ticks steps. Returns a report dict.
+    """
+    outcome = "timeout"
+    ticks = 0
+    start = time.perf_counter()
+    for state in inputs:
+        if ticks >= max_ticks:
+            break
+        profiling = PROFILER.enabled
+        if profiling:
+            PROFILER.begin()
+        result = step_level(player, world, level_id, int(state.jump), state)
+        if profiling:
+            PROFILER.mark("rules")
+            PROFILER.end()
+        ticks += 1
+        if result != "running":
+            outcome = result
+            break
+    elapsed = time.perf_counter() - start
+
+    return {
+        "level": level_id,
+        "outcome": outcome,
+        "ticks": ticks,
+        "score": player.score,
+        "health": player.health,
+        "x": player.rect.x,
+        "y": player.rect.y,
+        "seconds": elapsed,
+        "ticks_per_second": ticks / elapsed if elapsed > 0 else float("inf"),
+    }
+
+
+def run_headless(level_id, inputs, max_ticks=FPS * 60, activity_margin=None):
+    """
+    Simulates a level without a window, drawing or frame cap (see simulate).
+    Uses the SDL dummy driver unless a display is already up.
+    """
+    os.environ["SDL_VIDEODRIVER"] = "dummy" # Only takes effect if the display is not up yet
+    if not pygame.display.get_init():
+        init_display()
+
+    floor_y = HEIGHT - BLOCK_SIZE
+    player, world, _, _ = create_level_objects(level_id, BLOCK_SIZE, floor_y)
+    if activity_margin is not None:
+        world.activity_margin = activity_margin
+    return simulate(player, world, level_id, inputs, max_ticks)
+
+
+def replay(recording):
+    """
+    Feeds an InputRecording back through simulate() without rendering.
+    Returns (report, mismatches), where mismatches maps each recorded result
+    field the replay ended differently on to (recorded, replayed).
+    """
+    random.seed(recording.seed)
+    report = run_headless(recording.level_id, recording.inputs(), len(recording), recording.activity_margin)
+    mismatches = {key: (value, report[key]) for key, value in recording.result.items() if report[key] != value}
+    return report, mismatches
+
+
+def print_headless_report(report):
+    print(f"{report['level']}: {report['outcome']} after {report['ticks']} ticks "
+          f"(score {report['score']}, health {report['health']}, at {report['x']},{report['y']})")
+    print(f"{report['seconds']:.3f}s simulated, {report['ticks_per_second']:.0f} ticks/s "
+          f"({report['ticks_per_second'] / FPS:.1f}x real time)")
+
+
 def main(window):
     """The new main function manages the overall game state flow."""
     game_screen = "title_screen" # Start here
@@ -1193,7 +3457,7 @@ def main(window):
             # Returns "level_01", "level_02", "title_screen", or "quit"
             selected_level_id = display_level_select(window) 
             
-            if selected_level_id in ["level_01", "level_02"]:
+            if selected_level_id in LEVEL_IDS:
                 level_to_run = selected_level_id
                 game_screen = "running_level"
             else:
@@ -1218,14 +3482,26 @@ def main(window):
 
 # --- Collision Handling (re-included for completeness) ---
 
-def handle_vertical_collision(player, objects, dy):
-    """Handles collision in the Y-direction (jumping/falling)."""
+def handle_vertical_collision(player, objects, dy, collides=pygame.sprite.collide_mask, requery=None):
+    """
+    Handles collision in the Y-direction (jumping/falling).
+    objects are the candidates in level order. Each push can move the player
+    into blocks that weren't candidates before, so with requery(rect, after)
+    (a broadphase query for the blocks after `after` in level order) the
+    remaining candidates are looked up again after every push, which
+    resolves exactly like walking the whole level in order.
+    """
     collided_objects = []
+    objects = list(objects)
     
     # Check against blocks (terrain)
-    for obj in objects:
+    i = 0
+    while i < len(objects):
+        obj = objects[i]
+        i += 1
         if isinstance(obj, Block):
-            if pygame.sprite.collide_mask(player, obj):
+            if collides(player, obj):
+                position = player.rect.topleft
                 if dy > 0: # Falling
                     player.rect.bottom = obj.rect.top
                     player.landed()
@@ -1233,16 +3509,18 @@ def handle_vertical_collision(player, objects, dy):
                     player.rect.top = obj.rect.bottom
                     player.hit_head()
                 collided_objects.append(obj)
+                if requery is not None and player.rect.topleft != position:
+                    objects, i = requery(player.rect, obj), 0
                 
     return collided_objects
 
-def handle_horizontal_collision(player, objects, dx):
+def handle_horizontal_collision(player, objects, dx, collides=pygame.sprite.collide_mask):
     """Handles collision in the X-direction (running)."""
     collided = False
     
     for obj in objects:
         if isinstance(obj, Block):
-            if pygame.sprite.collide_mask(player, obj):
+            if collides(player, obj):
                 collided = True
                 if dx > 0: # Moving right
                     player.rect.right = obj.rect.left
@@ -1262,18 +3540,18 @@ def check_hit_trap(player, objects):
                     return True # Player was hit
     return False
 
-def check_collectible(player, objects):
-    """Checks for collision with collectibles (Bananas)."""
+def check_collectible(player, world, candidates):
+    """Checks for collision with collectibles (Bananas) and removes them from the world."""
     collected = []
-    for obj in objects:
+    for obj in candidates:
         if obj.name == "collectible":
             if pygame.sprite.collide_mask(player, obj):
                 player.add_score()
                 collected.append(obj)
     
-    # Remove collected items from the objects list
+    # Remove collected items from the world
     for item in collected:
-        objects.remove(item)
+        world.remove(item)
 
 def check_checkpoint(player, objects):
     """Checks for collision with start/end checkpoints."""
@@ -1290,11 +3568,11 @@ def check_checkpoint(player, objects):
                 return "win" 
     return None
 
-def handle_boss_collision(player, objects):
+def handle_boss_collision(player, world):
     """Handles all interaction with the RockHead boss."""
-    boss = next((obj for obj in objects if obj.name == "rockhead_boss" and obj.is_visible), None)
+    boss = world.boss
     
-    if not boss:
+    if not boss or not boss.is_visible:
         return 
 
     if pygame.sprite.collide_mask(player, boss):
@@ -1341,15 +3619,21 @@ def handle_boss_collision(player, objects):
                 else:
                     player.move(knockback_vel, 0)
 
-def handle_move(player, objects):
-    """Updates player position and checks all collision types."""
-    keys = pygame.key.get_pressed()
+def handle_move(player, world, inputs=None):
+    """
+    Updates player position and checks all collision types. Each check only
+    visits the objects in the spatial hash cells around the player; with a
+    tile grid, terrain is resolved from direct cell lookups.
+    inputs is an InputState; when omitted the keyboard is read.
+    """
+    if inputs is None:
+        inputs = InputState.from_keyboard()
     
     # 1. Reset horizontal velocity
     player.x_vel = 0
-    if keys[pygame.K_LEFT]:
+    if inputs.left:
         player.move_left(PLAYER_VEL)
-    if keys[pygame.K_RIGHT]:
+    if inputs.right:
         player.move_right(PLAYER_VEL)
     
     # 2. Level Boundary Check 
@@ -1357,23 +3641,51 @@ def handle_move(player, objects):
         player.x_vel = 0         
         player.rect.x = 0        
         
+    tile_grid = world.tile_grid
+
+    def nearby():
+        return world.spatial_hash.query(player.rect)
+
+    profiling = PROFILER.enabled
+
     # Apply vertical movement and check collision
     player.move(0, player.y_vel)
-    handle_vertical_collision(player, objects, player.y_vel)
+    if tile_grid is not None:
+        handle_vertical_collision(player, tile_grid.candidates(player.rect), player.y_vel, tile_grid.collides,
+                                  tile_grid.candidates)
+    else:
+        handle_vertical_collision(player, nearby(), player.y_vel, requery=world.spatial_hash.query)
+    if profiling:
+        PROFILER.mark("vertical")
     
     # Apply horizontal movement and check collision
     player.move(player.x_vel, 0)
-    handle_horizontal_collision(player, objects, player.x_vel)
+    if tile_grid is not None:
+        handle_horizontal_collision(player, tile_grid.candidates(player.rect), player.x_vel, tile_grid.collides)
+    else:
+        handle_horizontal_collision(player, nearby(), player.x_vel)
+    if profiling:
+        PROFILER.mark("horizontal")
     
     # Check for hazards, collectibles, and checkpoints
-    check_hit_trap(player, objects)
-    check_collectible(player, objects)
+    candidates = nearby()
+    check_hit_trap(player, candidates)
+    if profiling:
+        PROFILER.mark("traps")
+    check_collectible(player, world, candidates)
+    if profiling:
+        PROFILER.mark("collectibles")
     
     # Handle boss collision (only if boss is visible)
-    handle_boss_collision(player, objects)
+    handle_boss_collision(player, world)
+    if profiling:
+        PROFILER.mark("boss")
     
-    # Check for win condition (only needed for standard levels)
-    return check_checkpoint(player, objects)
+    # Check for win condition (only needed for standard levels); the boss knockback may have moved the player
+    result = check_checkpoint(player, nearby())
+    if profiling:
+        PROFILER.mark("checkpoints")
+    return result
 
 
 # --- Game Over Function ---
@@ -1384,7 +3696,6 @@ def display_game_over(window, result_type, message):
     Returns "restart" or "level_select".
     """
     BG_COLOR = (20, 20, 20)
-    clock = pygame.time.Clock()
     
     # Increased scale_factor to 3 for larger buttons
     BUTTON_SCALE = 3
@@ -1402,27 +3713,22 @@ def display_game_over(window, result_type, message):
         {"id": "level_select", "img": back_img, "rect": back_img.get_rect(center=(WIDTH // 2 + BUTTON_SPACING, CENTER_Y))},
     ]
 
-    waiting = True
-    while waiting:
-        clock.tick(FPS)
-        window.fill(BG_COLOR)
-        
-        # Display main message
-        title_color = (255, 255, 0) if result_type == "win" else (255, 50, 50)
-        draw_text(window, message, 60, WIDTH // 2, HEIGHT // 2 - 100, title_color)
-        draw_text(window, "What would you like to do?", 30, WIDTH // 2, HEIGHT // 2, (255, 255, 255))
-        
-        # Draw and handle buttons
-        for button in BUTTONS:
-            window.blit(button["img"], button["rect"].topleft)
-            
-            # Highlight on hover
-            if button["rect"].collidepoint(pygame.mouse.get_pos()):
-                pygame.draw.rect(window, (255, 255, 255), button["rect"], 3, 5)
+    frame = compose_menu(BG_COLOR)
+    
+    # Display main message
+    title_color = (255, 255, 0) if result_type == "win" else (255, 50, 50)
+    draw_text(frame, message, 60, WIDTH // 2, HEIGHT // 2 - 100, title_color)
+    draw_text(frame, "What would you like to do?", 30, WIDTH // 2, HEIGHT // 2, (255, 255, 255))
+    
+    for button in BUTTONS:
+        frame.blit(button["img"], button["rect"].topleft)
 
-        pygame.display.update()
+    menu = MenuFrame(frame, BUTTONS) # Highlights on hover
 
-        for event in pygame.event.get():
+    while True:
+        menu.present(window)
+
+        for event in menu.wait():
             if event.type == pygame.QUIT:
                 return "quit"
             
@@ -1434,11 +3740,66 @@ def display_game_over(window, result_type, message):
                     
             if event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1: # Left click
-                    for button in BUTTONS:
-                        if button["rect"].collidepoint(event.pos):
-                            return button["id"]
-                            
-    return "quit"
+                    button = menu.button_at(event.pos)
+                    if button is not None:
+                        return button["id"]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Uga-Buga Platformer")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print wall time per startup phase once the title screen is shown, then exit")
+    parser.add_argument("--parallax", type=float, default=BACKGROUND_PARALLAX,
+                        help="scroll the background at this fraction of the camera speed (default: static)")
+    parser.add_argument("--render-fps", type=int, default=RENDER_FPS,
+                        help="cap on rendered frames per second during play, 0 for uncapped (physics stays at 60 Hz)")
+    parser.add_argument("--max-catchup", type=int, default=MAX_CATCHUP_STEPS,
+                        help="most physics steps run per rendered frame when rendering falls behind")
+    parser.add_argument("--activity-margin", type=int, default=ACTIVITY_MARGIN,
+                        help="pixels outside the camera beyond which animated entities sleep")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="while the camera is still, redraw and present only the screen regions that changed")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="time every frame's phases and write the last few seconds to PATH (.csv or .json) at exit")
+    parser.add_argument("--record", metavar="PATH",
+                        help="write the inputs of each level run to its own PATH-<level>-<n> file, for --replay")
+    parser.add_argument("--replay", metavar="PATH",
+                        help="replay a --record file without a window and check it ends where it was recorded")
+    parser.add_argument("--headless", metavar="LEVEL", choices=LEVEL_IDS,
+                        help="simulate LEVEL without a window as fast as possible and print a report")
+    parser.add_argument("--ticks", type=int, default=FPS * 60,
+                        help="most simulation steps for --headless (default: one minute of game time)")
+    parser.add_argument("--input", choices=("idle", "right", "random"), default="right",
+                        help="scripted input for --headless")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed for --input random")
+    return parser.parse_args(argv)
+
 
 if __name__ == "__main__":
-    main(window)
\ No newline at end of file
+    args = parse_args()
+    STARTUP.enabled = args.startup_report
+    BACKGROUND_PARALLAX = args.parallax
+    RENDER_FPS = args.render_fps
+    MAX_CATCHUP_STEPS = max(1, args.max_catchup)
+    ACTIVITY_MARGIN = args.activity_margin
+    DIRTY_RECTS = args.dirty_rects
+    PROFILER.enabled = bool(args.profile)
+    RECORD_PATH = args.record
+    try:
+        if args.replay:
+            report, mismatches = replay(InputRecording.load(args.replay))
+            print_headless_report(report)
+            for key, (recorded, replayed) in mismatches.items():
+                print(f"MISMATCH {key}: recorded {recorded}, replayed {replayed}")
+            if not mismatches:
+                print(f"Replay matches {args.replay}")
+            raise SystemExit(1 if mismatches else 0)
+        elif args.headless:
+            print_headless_report(run_headless(args.headless, scripted_inputs(args.input, args.seed), args.ticks))
+        else:
+            STARTUP.mark("import")
+            main(init_display())
+    finally:
+        if args.profile:
+            PROFILER.dump(args.profile)
\ No newline at end of file